@@ -21,6 +21,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'partnership.staticfiles.StaticFilesMiddleware',
+    'partnership.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -42,6 +44,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'partnership.roles.role_context',
+                'partnership.fragments.fragment_cache_context',
             ],
         },
     },
@@ -56,6 +60,22 @@ DATABASES = {
     }
 }
 
+# OSA_DB_PROFILE=production: WAL and tuned pragmas on every connection,
+# connections kept across requests, and reads on a separate query-only
+# 'reader' connection (see partnership.database)
+DB_PROFILE = os.environ.get('OSA_DB_PROFILE', 'development')
+if DB_PROFILE == 'production':
+    from partnership.database import READER_ALIAS, SQLITE_PRODUCTION_PRAGMAS
+
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': 20},
+    })
+    DATABASES[READER_ALIAS] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    DATABASE_ROUTERS = ['partnership.database.ReaderRouter']
+    PARTNERSHIP_SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -80,11 +100,68 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed names plus .gz copies; the static
+# middleware serves them from STATIC_ROOT with immutable cache headers
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'partnership.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media goes through partnership.media.media_view for the permission check;
+# set to 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd) to have
+# the web server send the bytes. For nginx:
+#   location /protected-media/ { internal; alias /path/to/media/; }
+PARTNERSHIP_MEDIA_SENDFILE = os.environ.get('OSA_MEDIA_SENDFILE') or None
+PARTNERSHIP_MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# 'fragments' holds the rendered department cards; switch it to
+# django.core.cache.backends.filebased.FileBasedCache to share them
+# between worker processes
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'partnership-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+PARTNERSHIP_FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# API views that don't set their own permission_classes need a logged-in user
+REST_FRAMEWORK = {
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
+
+AUTHENTICATION_BACKENDS = [
+    'partnership.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
-LOGOUT_REDIRECT_URL = 'login'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'login'
+
+# Per-view query ceilings checked by partnership.metrics.MetricsMiddleware
+# ('log' warns, 'raise' fails the request - use it in tests)
+PARTNERSHIP_QUERY_BUDGETS = {
+    'dashboard': 8,
+    'owner_panel': 8,
+    'admin_panel': 10,
+    'department_detail': 6,
+    'department-list': 6,
+    'department-detail': 6,
+    'user-list': 6,
+    'stats': 4,
+}
+PARTNERSHIP_QUERY_BUDGET_ACTION = 'log'
+
+# Keep the resolved user type in the session (partnership.roles); a changed
+# user type then takes effect at the user's next login
+PARTNERSHIP_ROLE_IN_SESSION = False
@@ -1,8 +1,9 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from partnership import views  # Import your login_view
+from partnership.media import media_view
+from partnership.metrics import metrics_view
 
 urlpatterns = [
     # Admin site
@@ -13,9 +14,11 @@ urlpatterns = [
 
     # Include other partnership URLs (optional for dashboard, signup, API, etc.)
     path('partnership/', include('partnership.urls')),
-]
 
-# Serve static and media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    # Prometheus scrape target (request latency / query histograms)
+    path('metrics', metrics_view, name='metrics'),
+
+    # Uploaded logos, permission-checked (partnership.media); static files
+    # are served by partnership.staticfiles.StaticFilesMiddleware
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$', media_view, name='media'),
+]
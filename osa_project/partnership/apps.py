@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class PartnershipConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'partnership'
\ No newline at end of file
+    name = 'partnership'
+
+    def ready(self):
+        # Register signal handlers
+        from . import database, signals  # noqa: F401
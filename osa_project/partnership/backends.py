@@ -0,0 +1,52 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.db.models import OuterRef, Subquery
+
+from .models import Department
+
+
+def with_landing_department(queryset):
+    """Annotate each user with the id of the department a login lands on (their first)."""
+    first_department = Department.objects.filter(owner=OuterRef('pk')).order_by('id').values('id')[:1]
+    return queryset.annotate(landing_department_id=Subquery(first_department))
+
+
+def landing_department_id(user):
+    """The user's landing department id, from the login annotation when present."""
+    if hasattr(user, 'landing_department_id'):
+        return user.landing_department_id
+    return Department.objects.filter(owner=user).order_by('id').values_list('id', flat=True).first()
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticate with `email=` and `password=` in a single indexed lookup.
+    The returned user carries `landing_department_id`, so the login redirect
+    needs no further query. Username logins fall through to ModelBackend.
+
+    Sessions it logs in load the user with their profile joined, so role
+    checks (see roles.resolve_role) cost nothing extra per request.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        users = with_landing_department(User.objects.filter(email=email)).order_by('id')[:2]
+        users = list(users)
+        if len(users) != 1:
+            # Unknown or ambiguous email: still run the hasher so timing
+            # doesn't reveal which addresses are registered
+            User().set_password(password)
+            return None
+
+        user = users[0]
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,121 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Department
+from .signals import departments_bulk_changed
+
+BATCH_FIELDS = ('partnership_status', 'remarks_status')
+MAX_BATCH_SIZE = 1000
+
+
+# -----------------------------
+# Row validation
+# -----------------------------
+class DepartmentBatchRowSerializer(serializers.Serializer):
+    """One change in a batch: a department id and the fields to set."""
+    id = serializers.IntegerField()
+    partnership_status = serializers.ChoiceField(choices=Department.PARTNERSHIP_STATUS_CHOICES, required=False)
+    remarks_status = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+
+    def validate(self, data):
+        if not any(field in data for field in BATCH_FIELDS):
+            raise serializers.ValidationError(f"Set at least one of: {', '.join(BATCH_FIELDS)}.")
+        return data
+
+
+class BatchUpdateResult:
+    """
+    Per-row outcome of a batch: 'updated', 'unchanged', 'not_found',
+    'invalid', or 'skipped' when an all-or-nothing batch was rolled back.
+    """
+
+    def __init__(self):
+        self.results = []
+        self.applied = True
+
+    def add(self, index, department_id, outcome, errors=None):
+        entry = {'index': index, 'id': department_id, 'result': outcome}
+        if errors:
+            entry['errors'] = errors
+        self.results.append(entry)
+
+    def count(self, outcome):
+        return sum(1 for entry in self.results if entry['result'] == outcome)
+
+    @property
+    def failed(self):
+        return self.count('not_found') + self.count('invalid')
+
+    def to_dict(self):
+        self.results.sort(key=lambda entry: entry['index'])
+        return {
+            'updated': self.count('updated'),
+            'unchanged': self.count('unchanged'),
+            'failed': self.failed,
+            'applied': self.applied,
+            'results': self.results,
+        }
+
+
+# -----------------------------
+# Batch update
+# -----------------------------
+def batch_update_departments(rows, queryset=None, all_or_nothing=False):
+    """
+    Apply status/remarks changes to many departments at once:
+    - Every row is validated first; invalid rows and unknown ids are
+      reported per row and skipped
+    - The targets are loaded with one query and every real change is
+      written with a single bulk_update, in one transaction
+    - With all_or_nothing, any failed row means nothing is written
+    `queryset` limits which departments may be changed.
+    """
+    if len(rows) > MAX_BATCH_SIZE:
+        raise ValueError(f'At most {MAX_BATCH_SIZE} rows per batch.')
+
+    result = BatchUpdateResult()
+    changes = {}
+    for index, row in enumerate(rows):
+        serializer = DepartmentBatchRowSerializer(data=row)
+        if not serializer.is_valid():
+            result.add(index, row.get('id') if isinstance(row, dict) else None, 'invalid', serializer.errors)
+            continue
+        data = dict(serializer.validated_data)
+        department_id = data.pop('id')
+        if department_id in changes:
+            result.add(index, department_id, 'invalid', {'id': ['Duplicate department in batch.']})
+            continue
+        changes[department_id] = (index, data)
+
+    queryset = Department.objects.all() if queryset is None else queryset
+    with transaction.atomic():
+        departments = queryset.select_for_update().filter(pk__in=changes).only('id', *BATCH_FIELDS, 'last_updated')
+        found = {department.pk: department for department in departments}
+
+        changed = []
+        now = timezone.now()
+        for department_id, (index, data) in changes.items():
+            department = found.get(department_id)
+            if department is None:
+                result.add(index, department_id, 'not_found')
+                continue
+            if all(getattr(department, field) == value for field, value in data.items()):
+                result.add(index, department_id, 'unchanged')
+                continue
+            for field, value in data.items():
+                setattr(department, field, value)
+            department.last_updated = now
+            changed.append(department)
+            result.add(index, department_id, 'updated')
+
+        if all_or_nothing and result.failed:
+            result.applied = False
+            for entry in result.results:
+                if entry['result'] == 'updated':
+                    entry['result'] = 'skipped'
+        elif changed:
+            Department.objects.bulk_update(changed, [*BATCH_FIELDS, 'last_updated'])
+            departments_bulk_changed.send(sender=Department, departments=changed, action='updated')
+
+    return result
@@ -0,0 +1,358 @@
+import asyncio
+import datetime
+import io
+import math
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import DatabaseError, close_old_connections, connection, connections
+from django.utils import timezone
+from django.test import Client
+from django.urls import reverse
+
+from .database import sqlite_pragma_values
+from .metrics import record_queries
+from .models import Department
+from .seeding import SEED_ADMIN_USERNAME, SEED_PASSWORD
+
+PERCENTILES = (50, 95, 99)
+# Read-heavy pages compared between WSGI and ASGI
+SERVER_SCENARIOS = ['dashboard', 'department_detail', 'admin_panel', 'api_department_list', 'api_stats']
+
+
+class Scenario:
+    """One request to time: who sends it and how."""
+
+    def __init__(self, name, url, role='admin', method='get', data=None):
+        self.name = name
+        self.url = url
+        self.role = role
+        self.method = method
+        self.data = data
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+def default_scenarios():
+    admin = User.objects.get(username=SEED_ADMIN_USERNAME)
+    owner = (User.objects.filter(profile__user_type='department', departments__isnull=False)
+             .order_by('id').first())
+    department = Department.objects.order_by('id').first()
+    if owner is None or department is None:
+        raise ValueError('No seeded departments found; run seed_data first.')
+
+    return [
+        Scenario('login', reverse('login'), role=None, method='post',
+                 data={'email': admin.email, 'password': SEED_PASSWORD}),
+        Scenario('dashboard', reverse('dashboard')),
+        Scenario('dashboard_filtered', reverse('dashboard') + '?status=active&sort=-department_name'),
+        Scenario('dashboard_search', reverse('dashboard') + '?q=science'),
+        Scenario('dashboard_owner', reverse('dashboard'), role='owner'),
+        Scenario('admin_panel', reverse('admin_panel')),
+        Scenario('department_detail', reverse('department_detail', args=[department.pk])),
+        Scenario('api_department_list', reverse('department-list')),
+        Scenario('api_department_list_sparse', reverse('department-list') + '?fields=id,department_name'),
+        Scenario('api_department_detail', reverse('department-detail', args=[department.pk])),
+        Scenario('api_department_search', reverse('department-search') + '?q=science'),
+        Scenario('api_user_list', reverse('user-list')),
+        Scenario('api_stats', reverse('stats')),
+    ], {'admin': admin, 'owner': owner}
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(durations, query_counts, statuses):
+    ordered = sorted(durations)
+    summary = {f'p{pct}_ms': round(percentile(ordered, pct) * 1000, 3) for pct in PERCENTILES}
+    summary.update({
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'queries': {'min': min(query_counts), 'max': max(query_counts),
+                    'mean': round(sum(query_counts) / len(query_counts), 2)},
+        'statuses': sorted(set(statuses)),
+    })
+    return summary
+
+
+def time_request(client, scenario):
+    if scenario.role is None:
+        # Anonymous scenarios (login) start from a fresh session every time
+        client.cookies.clear()
+    with record_queries() as recorder:
+        start = time.perf_counter()
+        response = getattr(client, scenario.method)(scenario.url, scenario.data)
+        if hasattr(response, 'streaming_content'):
+            for _ in response.streaming_content:
+                pass
+        elapsed = time.perf_counter() - start
+    return elapsed, recorder.count, response.status_code
+
+
+def run_benchmark(iterations=50, warmup=5, only=None, host='localhost'):
+    """
+    Drive each scenario through the Django test client against the
+    configured database and return a JSON-serialisable report.
+    """
+    scenarios, users = default_scenarios()
+    if only:
+        unknown = set(only) - {scenario.name for scenario in scenarios}
+        if unknown:
+            raise ValueError(f'Unknown scenario(s): {", ".join(sorted(unknown))}')
+        scenarios = [scenario for scenario in scenarios if scenario.name in only]
+
+    clients = {None: Client(HTTP_HOST=host)}
+    for role, user in users.items():
+        clients[role] = Client(HTTP_HOST=host)
+        clients[role].force_login(user)
+
+    results = {}
+    for scenario in scenarios:
+        client = clients[scenario.role]
+        for _ in range(warmup):
+            time_request(client, scenario)
+        durations, query_counts, statuses = [], [], []
+        for _ in range(iterations):
+            elapsed, queries, status_code = time_request(client, scenario)
+            durations.append(elapsed)
+            query_counts.append(queries)
+            statuses.append(status_code)
+        results[scenario.name] = dict(url=scenario.url, method=scenario.method.upper(),
+                                      **summarize(durations, query_counts, statuses))
+
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'departments': Department.objects.count(),
+            'users': User.objects.count(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+        },
+        'results': results,
+    }
+
+
+# -----------------------------
+# WSGI vs ASGI throughput
+# -----------------------------
+def _latency_summary(durations, wall):
+    ordered = sorted(durations)
+    summary = {f'p{pct}_ms': round(percentile(ordered, pct) * 1000, 3) for pct in PERCENTILES}
+    summary['requests_per_second'] = round(len(ordered) / wall, 1)
+    return summary
+
+
+def _split_url(url):
+    path, _, query = url.partition('?')
+    return path, query
+
+
+def _wsgi_run(handler, url, cookie, host, total, concurrency):
+    path, query = _split_url(url)
+
+    def one(_):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': query,
+            'SERVER_NAME': host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': host, 'HTTP_COOKIE': cookie, 'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.input': io.BytesIO(b''), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        statuses = []
+        start = time.perf_counter()
+        body = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        for _ in body:
+            pass
+        if hasattr(body, 'close'):
+            body.close()
+        return time.perf_counter() - start, int(statuses[0].split()[0])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    return results, time.perf_counter() - start
+
+
+async def _asgi_run(handler, url, cookie, host, total, concurrency):
+    path, query = _split_url(url)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            done = asyncio.Event()
+            status = []
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                    done.set()
+
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+                'query_string': query.encode(), 'client': ('127.0.0.1', 0), 'server': (host, 80),
+                'headers': [(b'host', host.encode()), (b'cookie', cookie.encode())],
+            }
+            start = time.perf_counter()
+            await handler(scope, receive, send)
+            return time.perf_counter() - start, status[0]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(total)))
+    return results, time.perf_counter() - start
+
+
+def run_server_benchmark(requests=200, concurrency=20, only=None, host='localhost'):
+    """
+    Send the same concurrent load through Django's WSGI handler (a thread
+    per in-flight request) and its ASGI handler (one event loop), in
+    process, and compare throughput and latency per scenario.
+    """
+    scenarios, users = default_scenarios()
+    names = only or SERVER_SCENARIOS
+    scenarios = [scenario for scenario in scenarios if scenario.name in names]
+
+    client = Client(HTTP_HOST=host)
+    client.force_login(users['admin'])
+    cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+    wsgi, asgi = WSGIHandler(), ASGIHandler()
+    results = {}
+    for scenario in scenarios:
+        wsgi_results, wsgi_wall = _wsgi_run(wsgi, scenario.url, cookie, host, requests, concurrency)
+        asgi_results, asgi_wall = asyncio.run(
+            _asgi_run(asgi, scenario.url, cookie, host, requests, concurrency))
+        results[scenario.name] = {
+            'url': scenario.url,
+            'wsgi': dict(_latency_summary([d for d, _ in wsgi_results], wsgi_wall),
+                         statuses=sorted({code for _, code in wsgi_results})),
+            'asgi': dict(_latency_summary([d for d, _ in asgi_results], asgi_wall),
+                         statuses=sorted({code for _, code in asgi_results})),
+        }
+
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'requests': requests,
+            'concurrency': concurrency,
+            'departments': Department.objects.count(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+        },
+        'results': results,
+    }
+
+
+# -----------------------------
+# Concurrent database load
+# -----------------------------
+def _database_worker(department_ids, write_ratio, deadline, seed, samples, errors, lock):
+    rng = random.Random(seed)
+    reads, writes, failures = [], [], []
+    try:
+        while time.perf_counter() < deadline:
+            write = rng.random() < write_ratio
+            start = time.perf_counter()
+            try:
+                if write:
+                    Department.objects.filter(pk=rng.choice(department_ids)).update(
+                        remarks_status=f'benchmark edit {rng.random():.6f}', last_updated=timezone.now())
+                else:
+                    # What a dashboard page costs: one keyset page of cards
+                    list(Department.objects.filter(department_name__gt=f'{rng.choice("ABCDEFGHIJKLMNOP")}')
+                         .order_by('department_name', 'id')[:26])
+            except DatabaseError as exc:
+                failures.append(str(exc))
+            else:
+                (writes if write else reads).append(time.perf_counter() - start)
+            # Request boundary: closes the connection unless CONN_MAX_AGE keeps it
+            close_old_connections()
+    finally:
+        connections.close_all()
+        with lock:
+            samples['read'].extend(reads)
+            samples['write'].extend(writes)
+            errors.extend(failures)
+
+
+def run_database_benchmark(threads=8, duration=5.0, write_ratio=0.2):
+    """
+    Hammer the configured database from `threads` threads for `duration`
+    seconds with a read/write mix, closing connections between operations
+    the way request boundaries do. Run it once per DB profile and compare.
+    """
+    department_ids = list(Department.objects.values_list('id', flat=True)[:10000])
+    if not department_ids:
+        raise ValueError('No departments found; run seed_data first.')
+
+    samples, errors, lock = {'read': [], 'write': []}, [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    workers = [
+        threading.Thread(target=_database_worker,
+                         args=(department_ids, write_ratio, deadline, n, samples, errors, lock))
+        for n in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - start
+
+    results = {}
+    for kind, durations in samples.items():
+        if durations:
+            results[kind] = _latency_summary(durations, wall)
+    total = sum(len(durations) for durations in samples.values())
+
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'threads': threads,
+            'duration': duration,
+            'write_ratio': write_ratio,
+            'profile': getattr(settings, 'DB_PROFILE', 'development'),
+            'databases': sorted(settings.DATABASES),
+            'conn_max_age': settings.DATABASES['default'].get('CONN_MAX_AGE', 0),
+            'pragmas': sqlite_pragma_values() if connection.vendor == 'sqlite' else {},
+            'database': connection.vendor,
+        },
+        'operations_per_second': round(total / wall, 1),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'results': results,
+    }
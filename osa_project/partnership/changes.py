@@ -0,0 +1,114 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Department, DepartmentTombstone
+from .pagination import decode_cursor, encode_cursor
+
+DEFAULT_CHANGES_PAGE_SIZE = 500
+MAX_CHANGES_PAGE_SIZE = 1000
+# Rows stamped in the last few seconds may belong to transactions that
+# haven't committed yet; they are held back until the next poll so a
+# cursor never moves past a row the client couldn't see
+DEFAULT_SETTLE_SECONDS = 2
+
+
+class ChangeSet:
+    def __init__(self, changed, deleted, cursor, has_more):
+        self.changed = changed
+        self.deleted = deleted
+        self.cursor = cursor
+        self.has_more = has_more
+
+
+# -----------------------------
+# Cursor
+# -----------------------------
+def _position(value):
+    """(timestamp, id) from a cursor entry, or None for 'from the beginning'."""
+    try:
+        stamp, pk = value
+        stamp = parse_datetime(stamp)
+        return (stamp, int(pk)) if stamp else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_since(token):
+    """
+    Decode a `since` token into positions in the update and delete streams.
+    A missing token means a full sync (every department, no tombstones).
+    Raises ValueError for a token that isn't one of ours.
+    """
+    if not token:
+        return None, None
+    payload = decode_cursor(token)
+    if payload is None or 'u' not in payload:
+        raise ValueError('Invalid since cursor.')
+    return _position(payload['u']), _position(payload.get('d'))
+
+
+def _entry(position):
+    return [position[0].isoformat(), position[1]] if position else None
+
+
+def _after(queryset, field, position):
+    if position is None:
+        return queryset
+    stamp, pk = position
+    return queryset.filter(Q(**{f'{field}__gt': stamp}) | Q(**{field: stamp, 'id__gt': pk}))
+
+
+# -----------------------------
+# Feed
+# -----------------------------
+def get_changes_page_size(params):
+    try:
+        size = int(params.get('per_page', DEFAULT_CHANGES_PAGE_SIZE))
+    except (TypeError, ValueError):
+        size = DEFAULT_CHANGES_PAGE_SIZE
+    return max(1, min(size, MAX_CHANGES_PAGE_SIZE))
+
+
+def changes_since(token, queryset=None, limit=DEFAULT_CHANGES_PAGE_SIZE, now=None):
+    """
+    Departments created/updated and ids deleted after the `since` token:
+    - Each stream is one seek on an (timestamp, id) index, so a poll costs
+      the number of changes rather than the size of the table
+    - `cursor` resumes after the last row returned; keep polling with it
+      while `has_more` is set
+    """
+    updated_from, deleted_from = parse_since(token)
+    settle = getattr(settings, 'PARTNERSHIP_CHANGES_SETTLE_SECONDS', DEFAULT_SETTLE_SECONDS)
+    horizon = (now or timezone.now()) - datetime.timedelta(seconds=settle)
+
+    queryset = Department.objects.all() if queryset is None else queryset
+    changed = list(
+        _after(queryset.filter(last_updated__lte=horizon), 'last_updated', updated_from)
+        .order_by('last_updated', 'id')[:limit + 1]
+    )
+
+    # A full sync starts from the current state, so earlier deletes don't matter
+    if token:
+        tombstones = list(
+            _after(DepartmentTombstone.objects.filter(deleted_at__lte=horizon), 'deleted_at', deleted_from)
+            .order_by('deleted_at', 'id')
+            .values_list('deleted_at', 'id', 'department_id')[:limit + 1]
+        )
+    else:
+        last = DepartmentTombstone.objects.order_by('-deleted_at', '-id').values_list('deleted_at', 'id').first()
+        deleted_from, tombstones = last, []
+
+    has_more = len(changed) > limit or len(tombstones) > limit
+    changed, tombstones = changed[:limit], tombstones[:limit]
+
+    if changed:
+        updated_from = (changed[-1].last_updated, changed[-1].pk)
+    if tombstones:
+        deleted_from = tombstones[-1][:2]
+
+    cursor = encode_cursor({'u': _entry(updated_from), 'd': _entry(deleted_from)})
+    return ChangeSet(changed, [department_id for _, _, department_id in tombstones], cursor, has_more)
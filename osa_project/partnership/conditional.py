@@ -0,0 +1,87 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import DepartmentTombstone
+
+
+# -----------------------------
+# Validators
+# -----------------------------
+def _etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value else None
+
+
+def department_validators(department, *extra):
+    """ETag and Last-Modified timestamp for one department."""
+    return (
+        _etag(department.pk, department.last_updated.isoformat(), *extra),
+        _timestamp(department.last_updated),
+    )
+
+
+def _list_summary(summary, last_deleted, extra):
+    latest = summary['latest']
+    stamps = [stamp for stamp in (latest, last_deleted) if stamp]
+    return (
+        _etag(latest.isoformat() if latest else '-', summary['total'],
+              last_deleted.isoformat() if last_deleted else '-', *extra),
+        _timestamp(max(stamps) if stamps else None),
+    )
+
+
+def _last_deleted():
+    # Tombstones aren't scoped to the list; any delete revalidates it
+    return DepartmentTombstone.objects.aggregate(last=Max('deleted_at'))['last']
+
+
+def list_validators(queryset, *extra):
+    """
+    ETag and Last-Modified timestamp for a department list, from two
+    indexed aggregates: max(last_updated) catches edits (owner email
+    changes bump their departments too), the count and the newest
+    tombstone catch deletes, including of rows older than the newest.
+    """
+    summary = queryset.order_by().aggregate(latest=Max('last_updated'), total=Count('id'))
+    return _list_summary(summary, _last_deleted(), extra)
+
+
+async def alist_validators(queryset, *extra):
+    """list_validators() for async views."""
+    summary = await queryset.order_by().aaggregate(latest=Max('last_updated'), total=Count('id'))
+    deleted = await DepartmentTombstone.objects.aaggregate(last=Max('deleted_at'))
+    return _list_summary(summary, deleted['last'], extra)
+
+
+def role_key(role):
+    """What a page rendered for `role` depends on, for use in its ETag."""
+    return f'{int(role.is_superuser)}:{role.user_type or "-"}'
+
+
+# -----------------------------
+# Request / response helpers
+# -----------------------------
+def not_modified_response(request, etag, last_modified):
+    """Return a 304 (or 412) response if the client's copy is current, else None."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    """Attach the validators and ask clients to revalidate before reuse."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+READER_ALIAS = 'reader'
+
+# Applied to every new SQLite connection when PARTNERSHIP_SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',          # readers no longer block the writer (persistent in the file)
+    'synchronous': 'NORMAL',        # safe with WAL; fsync at checkpoints instead of every commit
+    'busy_timeout': 5000,           # wait up to 5s for a lock instead of failing
+    'cache_size': -20000,           # 20 MB page cache per connection
+    'mmap_size': 256 * 1024 * 1024, # read pages through a 256 MB memory map
+    'temp_store': 'MEMORY',         # sorts and temp b-trees stay off disk
+}
+
+
+# -----------------------------
+# Connection setup
+# -----------------------------
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Run PARTNERSHIP_SQLITE_PRAGMAS on each new SQLite connection; the reader is also made query-only."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(getattr(settings, 'PARTNERSHIP_SQLITE_PRAGMAS', {}))
+    if connection.alias == READER_ALIAS:
+        pragmas['query_only'] = 'ON'
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def sqlite_pragma_values(using='default', names=None):
+    """Current values of the given pragmas on one connection (for reports)."""
+    names = names or list(SQLITE_PRODUCTION_PRAGMAS)
+    with connections[using].cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None
+    return values
+
+
+# -----------------------------
+# Routing
+# -----------------------------
+class ReaderRouter:
+    """
+    Send reads to the READER_ALIAS connection and writes to 'default'.
+    Inside a transaction on 'default' reads stay there, so a view sees its
+    own uncommitted writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if READER_ALIAS not in settings.DATABASES or connections['default'].in_atomic_block:
+            return 'default'
+        return READER_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database file
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,213 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .images import LOGO_DIR, LOGO_VARIANTS, is_logo_variant, logo_digest, logo_variant_name
+from .jobs import heartbeat, task
+from .models import Department
+
+DEFAULT_BATCH_SIZE = 500
+# Users owning more departments than this are deleted in the background
+DEFAULT_BACKGROUND_DELETE_THRESHOLD = 100
+# Files younger than this may belong to an upload whose row hasn't committed yet
+DEFAULT_GC_GRACE_SECONDS = 60 * 60
+
+# Set while collect_released_logos() is active: released names gather here
+_released_logos = ContextVar('partnership_released_logos', default=None)
+
+
+class LogoCollectionResult:
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.freed_bytes = 0
+        self.elapsed = 0.0
+
+
+# -----------------------------
+# Logo references
+# -----------------------------
+def referenced_logos(names):
+    """
+    The subset of `names` still in use, in two queries: originals are in
+    use while a department's logo_path points at them, variants while a
+    department's logo_hash matches their content hash.
+    """
+    originals = [name for name in names if not is_logo_variant(name)]
+    digests = {logo_digest(name) for name in names if is_logo_variant(name)} - {None}
+
+    used = set()
+    if originals:
+        used.update(Department.objects.filter(logo_path__in=originals).values_list('logo_path', flat=True))
+    if digests:
+        used_digests = set(Department.objects.filter(logo_hash__in=digests).values_list('logo_hash', flat=True))
+        used.update(name for name in names if is_logo_variant(name) and logo_digest(name) in used_digests)
+    return used
+
+
+@task(max_attempts=3)
+def delete_unreferenced_logos(names):
+    """
+    Delete released logo files, with their variants, unless some other
+    department still uses them. Returns the number of files removed.
+    """
+    candidates = set(names)
+    for name in names:
+        digest = logo_digest(name)
+        if digest:
+            candidates.update(logo_variant_name(digest, variant) for variant in LOGO_VARIANTS)
+
+    deleted = 0
+    for name in sorted(candidates - referenced_logos(candidates)):
+        if default_storage.exists(name):
+            default_storage.delete(name)
+            deleted += 1
+    return deleted
+
+
+def release_logo(name):
+    """Queue cleanup of a logo file no department points at any more (runs once committed)."""
+    if not name:
+        return
+    collected = _released_logos.get()
+    if collected is not None:
+        collected.add(name)
+    else:
+        delete_unreferenced_logos.delay([name])
+
+
+@contextmanager
+def collect_released_logos():
+    """
+    Gather the logos released inside the block into the yielded set instead
+    of queueing a cleanup job for each; the caller queues one for all.
+    """
+    names = set()
+    token = _released_logos.set(names)
+    try:
+        yield names
+    finally:
+        _released_logos.reset(token)
+
+
+# -----------------------------
+# Cascade deletes
+# -----------------------------
+@task()
+def purge_user(user_id, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Delete a user's departments a batch per transaction, then the user.
+    Each department still goes through its delete signals (tombstones,
+    caches, live events); the logos they release are cleaned up by a
+    single job queued with the user's delete. A heartbeat after each batch
+    keeps a long purge from being requeued as stale. A retried job resumes
+    where the previous attempt stopped (logos released by a failed attempt
+    are left to collect_orphaned_logos).
+    """
+    from django.contrib.auth.models import User
+
+    departments = Department.objects.filter(owner_id=user_id)
+    with collect_released_logos() as released:
+        while True:
+            with transaction.atomic():
+                batch = list(departments.order_by('id').values_list('id', flat=True)[:batch_size])
+                if not batch:
+                    break
+                Department.objects.filter(pk__in=batch).delete()
+            heartbeat()
+    with transaction.atomic():
+        User.objects.filter(pk=user_id).delete()
+        _queue_logo_cleanup(released)
+
+
+def _queue_logo_cleanup(names):
+    if names:
+        delete_unreferenced_logos.delay(sorted(names))
+
+
+def delete_user(user):
+    """
+    Delete `user` and everything they own. Users with more departments
+    than PARTNERSHIP_BACKGROUND_DELETE_THRESHOLD are deactivated at once
+    and purged by a queued job. Returns True when deferred. Either way the
+    logos of the deleted departments are cleaned up by a single job.
+    """
+    threshold = getattr(settings, 'PARTNERSHIP_BACKGROUND_DELETE_THRESHOLD', DEFAULT_BACKGROUND_DELETE_THRESHOLD)
+    if not Department.objects.filter(owner=user)[threshold:threshold + 1].exists():
+        with transaction.atomic(), collect_released_logos() as released:
+            user.delete()
+            _queue_logo_cleanup(released)
+        return False
+
+    with transaction.atomic():
+        # Inactive users can't log in, and their sessions stop authenticating
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        purge_user.delay(user.pk)
+    return True
+
+
+# -----------------------------
+# Orphaned file collection
+# -----------------------------
+def iter_logo_files(root):
+    """Relative names and stat results of every file under MEDIA_ROOT/logos, streamed."""
+    pending = [os.path.join(root, LOGO_DIR)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    name = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                    yield name, entry.stat()
+
+
+def collect_orphaned_logos(batch_size=DEFAULT_BATCH_SIZE, grace_seconds=DEFAULT_GC_GRACE_SECONDS,
+                           dry_run=False, now=None):
+    """
+    Remove logo files no department refers to:
+    - The media directory is streamed; only `batch_size` names are held
+      at a time, each batch checked with two queries
+    - Files modified within `grace_seconds` are left alone
+    Needs a filesystem default storage.
+    """
+    started = time.monotonic()
+    root = default_storage.path('')
+    cutoff = (now or time.time()) - grace_seconds
+    result = LogoCollectionResult()
+
+    def sweep(batch):
+        unused = set(batch) - referenced_logos(list(batch))
+        for name in sorted(unused):
+            if not dry_run:
+                try:
+                    os.remove(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+            result.deleted += 1
+            result.freed_bytes += batch[name]
+
+    batch = {}
+    for name, stat in iter_logo_files(root):
+        result.scanned += 1
+        if stat.st_mtime > cutoff:
+            continue
+        batch[name] = stat.st_size
+        if len(batch) >= batch_size:
+            sweep(batch)
+            batch = {}
+    if batch:
+        sweep(batch)
+
+    result.elapsed = time.monotonic() - started
+    return result
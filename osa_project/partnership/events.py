@@ -0,0 +1,139 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+SUBSCRIBER_QUEUE_SIZE = 256
+REPLAY_BUFFER_SIZE = 500
+KEEPALIVE_SECONDS = 15
+# Streams end after this long and EventSource reconnects with Last-Event-ID.
+# Django's ASGI handler doesn't notice a client going away, so this bounds
+# how long a closed tab's subscriber can linger
+DEFAULT_STREAM_SECONDS = 5 * 60
+
+
+class Event:
+    def __init__(self, id, type, data):
+        self.id = id
+        self.type = type
+        self.data = data
+
+    def encode(self):
+        """The event as a Server-Sent Events message."""
+        payload = json.dumps(self.data, cls=DjangoJSONEncoder)
+        return f'id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n'
+
+
+# -----------------------------
+# In-process broadcaster
+# -----------------------------
+class Broadcaster:
+    """
+    Fan events out to every subscribed asyncio queue in this process.
+    publish() may be called from any thread (signal handlers run on sync
+    threads); each event is handed to its subscriber's own event loop.
+    Recent events are kept so a reconnecting client can resume from
+    Last-Event-ID.
+    """
+
+    def __init__(self, replay_size=REPLAY_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._recent = deque(maxlen=replay_size)
+        self._subscribers = set()
+
+    def publish(self, type, data):
+        with self._lock:
+            event = Event(next(self._ids), type, data)
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self._discard((loop, queue))
+        return event
+
+    def subscribe(self, last_event_id=None):
+        """Register a queue on the running loop, pre-filled with events after last_event_id."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event.id > last_event_id:
+                        _offer(queue, event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._discard(subscriber)
+
+    def _discard(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+def _offer(queue, event):
+    # A client that can't keep up is told to reload rather than blocking publishers
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(Event(event.id, 'resync', {}))
+    else:
+        queue.put_nowait(event)
+
+
+broadcaster = Broadcaster()
+
+
+# -----------------------------
+# Department events
+# -----------------------------
+def department_event_data(department):
+    return {
+        'id': department.pk,
+        'department_name': department.department_name,
+        'partnership_status': department.partnership_status,
+        'remarks_status': department.remarks_status,
+        'last_updated': department.last_updated,
+    }
+
+
+async def event_stream(subscriber, stats, keepalive=KEEPALIVE_SECONDS, max_seconds=DEFAULT_STREAM_SECONDS):
+    """
+    Yield SSE messages for a subscriber: queued events as they arrive, then
+    a 'stats' event with fresh counters after each burst. `stats` is an
+    async callable; a comment line is sent when idle to keep proxies open.
+    The stream ends after `max_seconds`; the client reconnects and resumes.
+    """
+    _, queue = subscriber
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+    yield 'retry: 3000\n\n'
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        try:
+            event = await asyncio.wait_for(queue.get(), timeout=min(keepalive, remaining))
+        except asyncio.TimeoutError:
+            if deadline > loop.time():
+                yield ': keepalive\n\n'
+            continue
+
+        last_id = event.id
+        yield event.encode()
+        while not queue.empty():
+            event = queue.get_nowait()
+            last_id = event.id
+            yield event.encode()
+        yield Event(last_id, 'stats', await stats()).encode()
@@ -0,0 +1,69 @@
+import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Department, TaskCheckpoint
+from .signals import departments_bulk_changed
+
+EXPIRATION_CHECKPOINT = 'expire_partnerships'
+DEFAULT_BATCH_SIZE = 500
+
+
+class ExpirationResult:
+    def __init__(self, expired, elapsed, since):
+        self.expired = expired
+        self.elapsed = elapsed
+        self.since = since
+
+
+def expired_departments(since=None, today=None):
+    """
+    Active departments whose expiration_date has passed.
+    With `since` (the previous run), only rows that can have become due
+    since then are scanned: those expiring on or after that day, and those
+    edited after it. Both branches are index range scans.
+    """
+    today = today or timezone.localdate()
+    queryset = Department.objects.filter(partnership_status='active', expiration_date__lt=today)
+    if since is not None:
+        queryset = queryset.filter(
+            Q(expiration_date__gte=timezone.localdate(since)) | Q(last_updated__gte=since)
+        )
+    return queryset
+
+
+def expire_partnerships(batch_size=DEFAULT_BATCH_SIZE, full=False, dry_run=False):
+    """
+    Flip expired active partnerships to inactive in batches:
+    - Each batch is one bulk_update in its own transaction
+    - The checkpoint only advances after every batch succeeded
+    """
+    started = time.monotonic()
+    run_at = timezone.now()
+    checkpoint, _ = TaskCheckpoint.objects.get_or_create(name=EXPIRATION_CHECKPOINT)
+    since = None if full else checkpoint.position
+    candidates = expired_departments(since=since, today=timezone.localdate(run_at))
+
+    expired = 0
+    if dry_run:
+        expired = candidates.count()
+    else:
+        while True:
+            with transaction.atomic():
+                batch = list(candidates.order_by('id').only('id', 'partnership_status')[:batch_size])
+                if not batch:
+                    break
+                now = timezone.now()
+                for department in batch:
+                    department.partnership_status = 'inactive'
+                    department.last_updated = now
+                Department.objects.bulk_update(batch, ['partnership_status', 'last_updated'])
+                departments_bulk_changed.send(sender=Department, departments=batch, action='updated')
+            expired += len(batch)
+
+        checkpoint.position = run_at
+        checkpoint.save(update_fields=['position', 'updated_at'])
+
+    return ExpirationResult(expired, time.monotonic() - started, since)
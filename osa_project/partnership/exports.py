@@ -0,0 +1,100 @@
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_CHUNK_SIZE = 2000
+
+DEPARTMENT_EXPORT_FIELDS = [
+    'id', 'department_name', 'business_email', 'email', 'contact_person', 'contact_number',
+    'owner_id', 'owner__email', 'established_date', 'expiration_date', 'partnership_status',
+    'remarks_status', 'created_at', 'last_updated',
+]
+
+USER_EXPORT_FIELDS = [
+    'id', 'username', 'email', 'is_active', 'is_superuser', 'date_joined',
+    'profile__user_type', 'profile__department_name', 'profile__business_email',
+    'profile__contact_person', 'profile__contact_number',
+]
+
+
+# -----------------------------
+# Row encoders
+# -----------------------------
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def iter_ndjson(rows, fields):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+async def aiter_csv(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    async for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+async def aiter_ndjson(rows, fields):
+    async for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+# -----------------------------
+# Row sources
+# -----------------------------
+async def aiter_rows(queryset):
+    """
+    .values() rows of a queryset ordered by id, for ASGI responses:
+    each batch is its own keyset query run through sync_to_async, so no
+    cursor is held open between awaits.
+    """
+    last_id = None
+    while True:
+        page = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        batch = await sync_to_async(list)(page[:EXPORT_CHUNK_SIZE])
+        for row in batch:
+            yield row
+        if len(batch) < EXPORT_CHUNK_SIZE:
+            return
+        last_id = batch[-1]['id']
+
+
+# -----------------------------
+# Streaming response
+# -----------------------------
+def export_response(queryset, fields, fmt, filename, asynchronous=False):
+    """
+    Stream `queryset` as CSV or NDJSON:
+    - Rows come from .values() (no model instances); `fields` must include id
+    - A fixed number of rows (EXPORT_CHUNK_SIZE) is held in memory
+    - Under WSGI the body is a sync generator over .iterator(chunk_size=...)
+    - With `asynchronous` (pass True under ASGI) it is an async generator
+      fetching batches by keyset; ASGI would buffer a sync iterator whole
+    """
+    rows = queryset.order_by('id').values(*fields)
+    if asynchronous:
+        encode, rows = (aiter_csv if fmt == 'csv' else aiter_ndjson), aiter_rows(rows)
+    else:
+        encode, rows = (iter_csv if fmt == 'csv' else iter_ndjson), rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    content = encode(rows, fields)
+    content_type = 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
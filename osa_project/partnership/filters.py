@@ -0,0 +1,54 @@
+from .models import Department, UserProfile
+
+DEPARTMENT_SORT_FIELDS = ['department_name', 'partnership_status', 'last_updated', 'id']
+
+
+# -----------------------------
+# Department list filters
+# -----------------------------
+def filter_departments(queryset, params):
+    """
+    Apply the shared list filters taken from a QueryDict:
+    - status: exact partnership_status
+    - name: case-insensitive match on department_name
+    """
+    status = params.get('status')
+    if status in dict(Department.PARTNERSHIP_STATUS_CHOICES):
+        queryset = queryset.filter(partnership_status=status)
+
+    name = (params.get('name') or '').strip()
+    if name:
+        queryset = queryset.filter(department_name__icontains=name)
+
+    return queryset
+
+
+def department_sort(params, default='department_name'):
+    """Return the requested sort key if it is allowed, else `default`."""
+    sort = params.get('sort') or default
+    return sort if sort.lstrip('-') in DEPARTMENT_SORT_FIELDS else default
+
+
+def department_filter_context(params, sort):
+    """Current filter values, used to pre-fill the filter form in templates."""
+    return {
+        'q': params.get('q', ''),
+        'status': params.get('status', ''),
+        'name': params.get('name', ''),
+        'sort': sort,
+        'status_choices': Department.PARTNERSHIP_STATUS_CHOICES,
+    }
+
+
+# -----------------------------
+# User list filters
+# -----------------------------
+def filter_users(queryset, params):
+    """
+    Apply the user list filters taken from a QueryDict:
+    - user_type: exact profile user_type
+    """
+    user_type = params.get('user_type')
+    if user_type in dict(UserProfile.USER_TYPE_CHOICES):
+        queryset = queryset.filter(profile__user_type=user_type)
+    return queryset
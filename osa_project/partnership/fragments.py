@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+
+# {% cache %} fragment names used by the department card templates
+DEPARTMENT_CARD_FRAGMENTS = ['department_card', 'owner_department_card']
+DEFAULT_FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+def fragment_cache_alias():
+    """PARTNERSHIP_FRAGMENT_CACHE, else the 'fragments' cache if configured, else 'default'."""
+    alias = getattr(settings, 'PARTNERSHIP_FRAGMENT_CACHE', None)
+    if alias:
+        return alias
+    return 'fragments' if 'fragments' in settings.CACHES else 'default'
+
+
+def fragment_cache_timeout():
+    return getattr(settings, 'PARTNERSHIP_FRAGMENT_CACHE_TIMEOUT', DEFAULT_FRAGMENT_TIMEOUT)
+
+
+def fragment_cache_context(request):
+    """Template context processor for {% cache fragment_cache.timeout ... using=fragment_cache.alias %}."""
+    return {'fragment_cache': {'alias': fragment_cache_alias(), 'timeout': fragment_cache_timeout()}}
+
+
+# -----------------------------
+# Invalidation
+# -----------------------------
+def department_card_keys(department_id, last_updated):
+    """Every cached card for one version of a department, across fragments and viewer roles."""
+    from .roles import ROLE_CACHE_KEYS
+
+    return [
+        make_template_fragment_key(fragment, [department_id, last_updated, role])
+        for fragment in DEPARTMENT_CARD_FRAGMENTS
+        for role in ROLE_CACHE_KEYS
+    ]
+
+
+def invalidate_department_cards(department_id, last_updated):
+    if last_updated is None:
+        return
+    caches[fragment_cache_alias()].delete_many(department_card_keys(department_id, last_updated))
@@ -0,0 +1,139 @@
+import hashlib
+import re
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .jobs import task
+
+LOGO_DIR = 'logos'
+LOGO_VARIANT_DIR = 'logos/variants'
+
+# Bounding boxes for the sizes the templates render
+LOGO_VARIANTS = {
+    'card': (400, 400),     # dashboard / owner panel cards
+    'detail': (800, 800),   # department detail page
+    'admin': (96, 96),      # admin panel table
+}
+LOGO_VARIANT_FORMAT = 'WEBP'
+# Accepted upload formats, as detected by Pillow, and the extension each is
+# stored under; the client's filename never decides how a logo is served
+LOGO_FORMATS = {
+    'PNG': '.png',
+    'JPEG': '.jpg',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+}
+LOGO_VARIANT_EXT = '.webp'
+
+# logos/<sha256>.<ext> and logos/variants/<sha256>_<variant>.webp
+_logo_digest = re.compile(r'(?:^|/)([0-9a-f]{64})(?:_[a-z]+)?\.[A-Za-z0-9]+$')
+
+
+# -----------------------------
+# Naming
+# -----------------------------
+def hash_file(file):
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(64 * 1024), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def logo_variant_name(digest, variant):
+    return f'{LOGO_VARIANT_DIR}/{digest}_{variant}{LOGO_VARIANT_EXT}'
+
+
+def logo_digest(name):
+    """The content hash a logo or variant file is named by, or None."""
+    match = _logo_digest.search(name)
+    return match.group(1) if match else None
+
+
+def is_logo_variant(name):
+    return name.startswith(f'{LOGO_VARIANT_DIR}/')
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+def store_logo(department, upload):
+    """
+    Save an uploaded logo under its content hash and point `department` at it:
+    - Raises ValidationError unless Pillow reads it as one of LOGO_FORMATS;
+      the stored extension comes from that format, not the upload's name
+    - An identical logo already on disk is reused instead of written again
+    - The model is not saved; variants are built by generate_logo_variants()
+    - The replaced file is released for cleanup once the department is saved
+    """
+    try:
+        with Image.open(upload) as image:
+            image_format = image.format
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ValidationError('Upload a valid image file.')
+    if image_format not in LOGO_FORMATS:
+        raise ValidationError(f"Upload a {', '.join(LOGO_FORMATS)} image.")
+
+    digest = hash_file(upload)
+    name = f'{LOGO_DIR}/{digest}{LOGO_FORMATS[image_format]}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, upload)
+
+    previous = department.logo_path.name if department.logo_path else None
+    if previous and previous != name:
+        department._replaced_logo = previous
+    department.logo_path.name = name
+    department.logo_hash = ''
+
+
+def generate_logo_variants(department):
+    """
+    Render the fixed-size variants of a department's logo and record its hash.
+    Variants are named by content hash, so departments sharing a logo share
+    the files and only missing variants are rendered.
+    """
+    from .models import Department
+
+    if not department.logo_path:
+        return None
+
+    with default_storage.open(department.logo_path.name, 'rb') as source:
+        digest = hash_file(source)
+        missing = [variant for variant in LOGO_VARIANTS
+                   if not default_storage.exists(logo_variant_name(digest, variant))]
+        if missing:
+            with Image.open(source) as image:
+                image = ImageOps.exif_transpose(image)
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA')
+                for variant in missing:
+                    thumb = image.copy()
+                    thumb.thumbnail(LOGO_VARIANTS[variant], Image.LANCZOS)
+                    buffer = BytesIO()
+                    thumb.save(buffer, LOGO_VARIANT_FORMAT, quality=85)
+                    default_storage.save(logo_variant_name(digest, variant), ContentFile(buffer.getvalue()))
+
+    # Only mark the row if the logo wasn't replaced in the meantime
+    Department.objects.filter(pk=department.pk, logo_path=department.logo_path.name).update(
+        logo_hash=digest, last_updated=timezone.now()
+    )
+    department.logo_hash = digest
+    return digest
+
+
+@task()
+def build_logo_variants(department_id):
+    """generate_logo_variants() as a queued job, for views that shouldn't wait on Pillow."""
+    from .models import Department
+
+    department = Department.objects.filter(pk=department_id).only('id', 'logo_path').first()
+    if department is not None:
+        generate_logo_variants(department)
@@ -0,0 +1,216 @@
+import csv
+import json
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from .models import Department
+from .serializers import DepartmentSerializer
+from .signals import departments_bulk_changed
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_ERRORS = 1000
+
+
+# -----------------------------
+# Row validation
+# -----------------------------
+class DepartmentImportSerializer(DepartmentSerializer):
+    """
+    DepartmentSerializer rules for one imported row.
+    The owner is given as an id or an email and resolved per batch,
+    so validating a row never touches the database.
+    """
+    owner = serializers.IntegerField(required=False)
+    owner_email = serializers.EmailField(required=False)
+
+    class Meta(DepartmentSerializer.Meta):
+        fields = ['owner', 'owner_email', 'department_name', 'business_email', 'email',
+                  'contact_person', 'contact_number', 'established_date', 'expiration_date',
+                  'partnership_status', 'remarks_status']
+
+
+class ImportResult:
+    """Running totals for an import; keeps at most `max_errors` error entries."""
+
+    def __init__(self, max_errors=DEFAULT_MAX_ERRORS):
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+# -----------------------------
+# Streaming parsers
+# -----------------------------
+class ImportDecodeError(ValueError):
+    """The stream stopped being readable text at `line`; nothing after it can be parsed."""
+
+    def __init__(self, line, exc):
+        super().__init__(f'Line {line}: file is not valid UTF-8 text ({exc.reason}).')
+        self.line = line
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield (line, row, error) for each record of a text stream, one at a time.
+    Empty CSV cells are dropped so optional fields fall back to their defaults.
+    A malformed CSV record is reported as that row's error; undecodable
+    input raises ImportDecodeError, since the stream can't be resumed.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as exc:
+                yield reader.line_num, None, {'non_field_errors': [f'Invalid CSV: {exc}']}
+                continue
+            except UnicodeDecodeError as exc:
+                raise ImportDecodeError(reader.line_num + 1, exc)
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ('', None)}, None
+
+    line = 0
+    try:
+        for line, text in enumerate(stream, 1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as exc:
+                yield line, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+                continue
+            if not isinstance(row, dict):
+                yield line, None, {'non_field_errors': ['Expected a JSON object.']}
+                continue
+            yield line, row, None
+    except UnicodeDecodeError as exc:
+        raise ImportDecodeError(line + 1, exc)
+
+
+def guess_format(filename):
+    """Return 'csv' or 'ndjson' from a file name, or None if unknown."""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+# -----------------------------
+# Import
+# -----------------------------
+def import_departments(stream, fmt, default_owner=None, batch_size=DEFAULT_BATCH_SIZE,
+                       max_errors=DEFAULT_MAX_ERRORS, on_error=None):
+    """
+    Stream-import departments from a CSV or NDJSON text stream:
+    - Only `batch_size` rows are held in memory at a time
+    - Each batch is validated, then inserted with bulk_create in its own transaction
+    - Rows without an owner are assigned to `default_owner`
+    - `on_error(line, errors)` is called for every rejected row
+    - Undecodable input raises ImportDecodeError if no batch has been
+      written yet; after that it ends the import as a rejected row, so the
+      result still reports what was committed
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+    result = ImportResult(max_errors=max_errors)
+
+    def reject(line, errors):
+        result.add_error(line, errors)
+        if on_error:
+            on_error(line, errors)
+
+    batch, written = [], False
+    try:
+        for line, row, error in iter_rows(stream, fmt):
+            result.rows += 1
+            if error:
+                reject(line, error)
+                continue
+            batch.append((line, row))
+            if len(batch) >= batch_size:
+                _import_batch(batch, default_owner, result, reject)
+                batch, written = [], True
+    except ImportDecodeError as exc:
+        if not written:
+            raise
+        result.rows += 1
+        reject(exc.line, {'non_field_errors': [str(exc)]})
+    if batch:
+        _import_batch(batch, default_owner, result, reject)
+
+    return result
+
+
+def _import_batch(batch, default_owner, result, reject):
+    valid = []
+    for line, row in batch:
+        serializer = DepartmentImportSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((line, serializer.validated_data))
+        else:
+            reject(line, serializer.errors)
+    if not valid:
+        return
+
+    # Resolve every owner id/email referenced by the batch in one query
+    ids = {data['owner'] for _, data in valid if 'owner' in data}
+    emails = {data['owner_email'] for _, data in valid if 'owner_email' in data and 'owner' not in data}
+    by_id, by_email = set(), {}
+    if ids or emails:
+        for user_id, email in User.objects.filter(Q(id__in=ids) | Q(email__in=emails)).values_list('id', 'email'):
+            by_id.add(user_id)
+            by_email.setdefault(email, user_id)
+
+    departments, lines = [], []
+    for line, data in valid:
+        data = dict(data)
+        owner_id = data.pop('owner', None)
+        owner_email = data.pop('owner_email', None)
+        if owner_id is not None:
+            owner_id = owner_id if owner_id in by_id else None
+        elif owner_email is not None:
+            owner_id = by_email.get(owner_email)
+        elif default_owner is not None:
+            owner_id = default_owner.pk
+        if owner_id is None:
+            reject(line, {'owner': ['Unknown or missing owner.']})
+            continue
+        departments.append(Department(owner_id=owner_id, **data))
+        lines.append(line)
+
+    if not departments:
+        return
+    try:
+        with transaction.atomic():
+            created = Department.objects.bulk_create(departments)
+            departments_bulk_changed.send(sender=Department, departments=created, action='created')
+    except DatabaseError as exc:
+        for line in lines:
+            reject(line, {'non_field_errors': [str(exc)]})
+        return
+    result.created += len(created)
@@ -0,0 +1,312 @@
+import datetime
+import itertools
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from functools import update_wrapper
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+# Retry n waits backoff * 2**(n-1) seconds, capped at MAX_BACKOFF_SECONDS
+DEFAULT_BACKOFF_SECONDS = 10
+MAX_BACKOFF_SECONDS = 60 * 60
+DEFAULT_POLL_INTERVAL = 1.0
+# A running job whose worker hasn't finished it (or sent a heartbeat()) in
+# this long is assumed lost
+DEFAULT_STALE_SECONDS = 30 * 60
+# Finished jobs are kept this long for inspection, then pruned by the worker
+DEFAULT_KEEP_SECONDS = 7 * 24 * 60 * 60
+# Tries at recording a job's outcome while another writer holds the database
+OUTCOME_WRITE_ATTEMPTS = 5
+
+_tasks = {}
+_claims = itertools.count(1)
+# The job run_job() is running in this thread/process, for heartbeat()
+_current_job = ContextVar('partnership_current_job', default=None)
+
+
+# -----------------------------
+# Declaring tasks
+# -----------------------------
+class Task:
+    """
+    A function that can also be queued: `fn(...)` runs it now,
+    `fn.delay(...)` stores a job and returns at once. Arguments must be
+    JSON-serializable (pass ids, not model instances).
+    """
+
+    def __init__(self, func, name=None, max_attempts=DEFAULT_MAX_ATTEMPTS, backoff=DEFAULT_BACKOFF_SECONDS):
+        self.func = func
+        self.name = name or f'{func.__module__}.{func.__qualname__}'
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """
+        Queue the task. The job row is written in the current transaction,
+        so it only becomes visible to workers if the caller commits.
+        With PARTNERSHIP_JOBS_EAGER the task runs inline after commit instead.
+        """
+        if getattr(settings, 'PARTNERSHIP_JOBS_EAGER', False):
+            transaction.on_commit(lambda: self.func(*args, **kwargs))
+            return None
+        return enqueue(self.name, args, kwargs, max_attempts=self.max_attempts)
+
+    def retry_delay(self, attempts):
+        return datetime.timedelta(seconds=min(self.backoff * 2 ** max(attempts - 1, 0), MAX_BACKOFF_SECONDS))
+
+
+def task(func=None, **options):
+    """
+    Register a function as a background task:
+
+        @task(max_attempts=3)
+        def rebuild_thumbnails(department_id): ...
+
+        rebuild_thumbnails.delay(department.pk)
+    """
+    def register(func):
+        wrapped = Task(func, **options)
+        _tasks[wrapped.name] = wrapped
+        return wrapped
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    return _tasks.get(name)
+
+
+def enqueue(name, args=(), kwargs=None, max_attempts=DEFAULT_MAX_ATTEMPTS, run_after=None):
+    from .models import Job
+
+    return Job.objects.create(task=name, args=list(args), kwargs=kwargs or {}, max_attempts=max_attempts,
+                              run_after=run_after or timezone.now())
+
+
+# -----------------------------
+# Claiming
+# -----------------------------
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_jobs(limit, worker=None, now=None):
+    """
+    Atomically take up to `limit` due jobs and mark them running.
+    A SELECT ... LIMIT picks candidate ids; the UPDATE only flips rows that
+    are still queued and stamps them with a token unique to this claim, so
+    two workers racing for the same rows can't both win one. The claimed
+    rows are then read back by that token.
+    """
+    from .models import Job
+
+    now = now or timezone.now()
+    token = f'{worker or worker_name()}#{next(_claims)}'
+    due = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after', 'id')
+
+    def mark(ids):
+        if ids:
+            Job.objects.filter(pk__in=ids, status='queued').update(
+                status='running', locked_by=token, locked_at=now, attempts=F('attempts') + 1,
+            )
+
+    if connection.features.has_select_for_update_skip_locked:
+        # Row locks let concurrent workers skip each other's candidates
+        with transaction.atomic():
+            mark(list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit]))
+    else:
+        # SQLite: no row locks, and a read-then-write transaction fails with
+        # "database is locked" if another writer got in first; run the two
+        # statements on their own and let the guarded UPDATE decide
+        mark(list(due.values_list('id', flat=True)[:limit]))
+    return list(Job.objects.filter(locked_by=token, status='running').order_by('run_after', 'id'))
+
+
+def requeue_stale_jobs(stale_seconds=DEFAULT_STALE_SECONDS, now=None):
+    """Put jobs whose worker died mid-run back in the queue."""
+    from .models import Job
+
+    cutoff = (now or timezone.now()) - datetime.timedelta(seconds=stale_seconds)
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_by='', locked_at=None,
+    )
+
+
+def heartbeat():
+    """
+    Mark the running job as still alive, so requeue_stale_jobs() doesn't
+    hand it to another worker. Long tasks call this between units of work;
+    outside a worker it does nothing. Returns False if the job's lock was lost.
+    """
+    from .models import Job
+
+    job = _current_job.get()
+    if job is None:
+        return True
+    return Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status='running').update(
+        locked_at=timezone.now(),
+    ) == 1
+
+
+def prune_jobs(keep_seconds=DEFAULT_KEEP_SECONDS, now=None):
+    """Delete succeeded and failed jobs that finished more than keep_seconds ago."""
+    from .models import Job
+
+    cutoff = (now or timezone.now()) - datetime.timedelta(seconds=keep_seconds)
+    deleted, _ = Job.objects.filter(status__in=['succeeded', 'failed'], finished_at__lt=cutoff).delete()
+    return deleted
+
+
+# -----------------------------
+# Running
+# -----------------------------
+def _record_outcome(claimed, **fields):
+    # The work is already done; don't lose its outcome (and run it again)
+    # because SQLite was briefly locked by another writer
+    for attempt in range(OUTCOME_WRITE_ATTEMPTS):
+        try:
+            return claimed.update(locked_by='', locked_at=None, **fields)
+        except OperationalError:
+            if attempt == OUTCOME_WRITE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome: succeeded, queued again after
+    a backoff, or failed once max_attempts is used up. Returns the status.
+    """
+    from .models import Job
+
+    claimed = Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status='running')
+    task_ = get_task(job.task)
+    current = _current_job.set(job)
+    try:
+        if task_ is None:
+            raise LookupError(f'Unknown task {job.task!r}')
+        task_.func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if task_ is not None and job.attempts < job.max_attempts:
+            status = 'queued'
+            _record_outcome(claimed, status=status, run_after=now + task_.retry_delay(job.attempts), last_error=error)
+        else:
+            status = 'failed'
+            _record_outcome(claimed, status=status, finished_at=now, last_error=error)
+        logger.warning('Job %s (%s) attempt %s failed:\n%s', job.pk, job.task, job.attempts, error)
+        return status
+    finally:
+        _current_job.reset(current)
+
+    _record_outcome(claimed, status='succeeded', finished_at=timezone.now())
+    return 'succeeded'
+
+
+def _run_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        # Pool threads hold their own connections; don't leave them open between jobs
+        connections.close_all()
+
+
+def _setup_process():
+    import django
+    django.setup()
+
+
+def _run_in_process(job_id, token):
+    from .models import Job
+
+    job = Job.objects.filter(pk=job_id, locked_by=token).first()
+    return run_job(job) if job else None
+
+
+class Worker:
+    """
+    Poll the job table and run due jobs on a pool of `concurrency` threads
+    (default; I/O-bound work and SQLite) or processes (CPU-bound work such
+    as image processing). Only as many jobs are claimed as there are free
+    slots, so queued work stays available to other workers.
+    """
+
+    def __init__(self, concurrency=2, mode='thread', poll_interval=DEFAULT_POLL_INTERVAL,
+                 stale_seconds=DEFAULT_STALE_SECONDS, name=None):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f'Unknown worker mode: {mode}')
+        self.concurrency = concurrency
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.name = name or worker_name()
+        self.processed = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _pool(self):
+        if self.mode == 'process':
+            # spawn, not fork: children must not share the parent's DB connections
+            return ProcessPoolExecutor(self.concurrency, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_setup_process)
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix='partnership-job')
+
+    def _submit(self, pool, job):
+        if self.mode == 'process':
+            return pool.submit(_run_in_process, job.pk, job.locked_by)
+        return pool.submit(_run_in_thread, job)
+
+    def run(self, burst=False):
+        """Work until stop() is called or, with `burst`, until the queue is empty."""
+        running = set()
+        last_maintenance = 0.0
+        with self._pool() as pool:
+            while not self._stop.is_set():
+                free = self.concurrency - len(running)
+                claimed = True
+                try:
+                    if time.monotonic() - last_maintenance > self.stale_seconds / 10:
+                        requeue_stale_jobs(self.stale_seconds)
+                        prune_jobs(getattr(settings, 'PARTNERSHIP_JOBS_KEEP_SECONDS', DEFAULT_KEEP_SECONDS))
+                        last_maintenance = time.monotonic()
+                    jobs = claim_jobs(free, worker=self.name) if free else []
+                except OperationalError:
+                    # Database busy: try again on the next poll
+                    logger.warning('Could not claim jobs', exc_info=True)
+                    jobs, claimed = [], False
+                running.update(self._submit(pool, job) for job in jobs)
+
+                if not running:
+                    if burst and claimed:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+                # With every slot busy, wait for one to free up; otherwise poll for new jobs
+                timeout = None if len(running) >= self.concurrency else self.poll_interval
+                done, running = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.processed += 1
+                    if future.exception():
+                        logger.error('Job runner crashed', exc_info=future.exception())
+            wait(running)
+            self.processed += len(running)
+        return self.processed
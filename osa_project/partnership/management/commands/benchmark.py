@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from partnership.benchmark import run_benchmark, run_database_benchmark, run_server_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Time the main views and API endpoints through the test client and report JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Untimed requests per scenario before measuring')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Only run this scenario (repeatable)')
+        parser.add_argument('--host', default='localhost',
+                            help='Host header to send (must be in ALLOWED_HOSTS)')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+        parser.add_argument('--servers', action='store_true',
+                            help='Compare WSGI and ASGI throughput under concurrent load instead')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='With --servers: requests per scenario and server')
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help='With --servers: requests in flight at once')
+        parser.add_argument('--database', action='store_true',
+                            help='Multi-threaded read/write load on the database instead '
+                                 '(run under each OSA_DB_PROFILE and compare)')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='With --database: worker threads')
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help='With --database: seconds to run')
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='With --database: share of operations that write')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+        try:
+            if options['database']:
+                report = run_database_benchmark(threads=options['threads'], duration=options['duration'],
+                                                write_ratio=options['write_ratio'])
+            elif options['servers']:
+                report = run_server_benchmark(requests=options['requests'], concurrency=options['concurrency'],
+                                              only=options['scenarios'], host=options['host'])
+            else:
+                report = run_benchmark(iterations=options['iterations'], warmup=options['warmup'],
+                                       only=options['scenarios'], host=options['host'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stderr.write(f'Wrote {options["output"]}')
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from partnership.images import generate_logo_variants
+from partnership.models import Department
+
+
+class Command(BaseCommand):
+    help = 'Generate logo thumbnails for departments whose logo has none yet.'
+
+    def handle(self, *args, **options):
+        departments = (Department.objects.exclude(logo_path='').exclude(logo_path__isnull=True)
+                       .filter(logo_hash='').only('id', 'logo_path'))
+        done = failed = 0
+        for department in departments.iterator(chunk_size=500):
+            try:
+                generate_logo_variants(department)
+            except OSError as exc:
+                failed += 1
+                self.stderr.write(f'Department {department.pk}: {exc}')
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {done} logos ({failed} failed).'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from partnership.expiration import DEFAULT_BATCH_SIZE, expire_partnerships
+
+
+class Command(BaseCommand):
+    help = 'Mark active partnerships whose expiration date has passed as inactive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows per bulk_update/transaction')
+        parser.add_argument('--full', action='store_true',
+                            help='Ignore the checkpoint and scan every active partnership')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count what would expire')
+
+    def handle(self, *args, **options):
+        result = expire_partnerships(batch_size=options['batch_size'], full=options['full'],
+                                     dry_run=options['dry_run'])
+        scope = 'full scan' if result.since is None else f'changes since {result.since:%Y-%m-%d %H:%M:%S}'
+        verb = 'Would expire' if options['dry_run'] else 'Expired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.expired} partnerships in {result.elapsed:.3f}s ({scope}).'
+        ))
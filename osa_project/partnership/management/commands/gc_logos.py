@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from partnership.deletion import DEFAULT_BATCH_SIZE, DEFAULT_GC_GRACE_SECONDS, collect_orphaned_logos
+
+
+class Command(BaseCommand):
+    help = 'Delete logo files and thumbnails that no department refers to.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='File names checked against the database per query')
+        parser.add_argument('--grace', type=int, default=DEFAULT_GC_GRACE_SECONDS,
+                            help='Leave files modified within this many seconds')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        result = collect_orphaned_logos(batch_size=options['batch_size'], grace_seconds=options['grace'],
+                                        dry_run=options['dry_run'])
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.deleted} of {result.scanned} logo files '
+            f'({result.freed_bytes / 1024:.1f} KiB) in {result.elapsed:.3f}s.'
+        ))
@@ -0,0 +1,63 @@
+import io
+import json
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from partnership.importers import (
+    DEFAULT_BATCH_SIZE, IMPORT_FORMATS, ImportDecodeError, guess_format, import_departments,
+)
+
+
+class Command(BaseCommand):
+    help = 'Stream-import departments from a CSV or NDJSON file ("-" reads stdin).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or "-" for stdin')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, dest='fmt',
+                            help='Input format (default: from the file extension)')
+        parser.add_argument('--owner', help='Email of the user owning rows that name no owner')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows per bulk_create/transaction')
+        parser.add_argument('--errors', help='Write rejected rows as NDJSON to this file')
+
+    def handle(self, *args, **options):
+        fmt = options['fmt'] or guess_format(options['path'])
+        if fmt is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+
+        default_owner = None
+        if options['owner']:
+            try:
+                default_owner = User.objects.get(email=options['owner'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['owner']}")
+
+        errors_file = open(options['errors'], 'w') if options['errors'] else None
+
+        def on_error(line, errors):
+            if errors_file:
+                errors_file.write(json.dumps({'line': line, 'errors': errors}) + '\n')
+            else:
+                self.stderr.write(f'line {line}: {json.dumps(errors)}')
+
+        if options['path'] == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            stream = open(options['path'], encoding='utf-8-sig', newline='')
+
+        try:
+            result = import_departments(stream, fmt, default_owner=default_owner,
+                                        batch_size=options['batch_size'], max_errors=0,
+                                        on_error=on_error)
+        except ImportDecodeError as exc:
+            raise CommandError(str(exc))
+        finally:
+            stream.close()
+            if errors_file:
+                errors_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} of {result.rows} rows ({result.failed} rejected).'
+        ))
@@ -0,0 +1,36 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from partnership.jobs import DEFAULT_POLL_INTERVAL, DEFAULT_STALE_SECONDS, Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (logo thumbnails, cascade deletes, file cleanup).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2,
+                            help='Jobs run at the same time')
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                            help='Run jobs on a thread pool or a process pool')
+        parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                            help='Seconds between polls when the queue is empty')
+        parser.add_argument('--stale-seconds', type=int, default=DEFAULT_STALE_SECONDS,
+                            help='Requeue running jobs locked for longer than this')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        worker = Worker(concurrency=options['concurrency'], mode=options['mode'],
+                        poll_interval=options['poll_interval'], stale_seconds=options['stale_seconds'])
+
+        # Finish the jobs in hand on SIGTERM/Ctrl-C, then exit
+        def stop(signum, frame):
+            self.stderr.write('Stopping after the running jobs finish...')
+            worker.stop()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f'Worker {worker.name}: {worker.concurrency} {worker.mode} slots.')
+        processed = worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs.'))
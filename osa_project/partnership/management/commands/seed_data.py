@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from partnership.seeding import DEFAULT_BATCH_SIZE, SEED_PASSWORD, SEED_SIZES, clear_seed_data, seed
+
+
+class Command(BaseCommand):
+    help = 'Bulk insert synthetic users, profiles and departments for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('size', nargs='?', choices=sorted(SEED_SIZES), default='small',
+                            help='Preset department volume: small=10k, medium=100k, large=1M')
+        parser.add_argument('--departments', type=int,
+                            help='Exact number of departments (overrides size)')
+        parser.add_argument('--users', type=int,
+                            help='Number of users (default: one per 10 departments)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows per bulk_create/transaction')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed; the same seed produces the same data')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously seeded rows first')
+
+    def handle(self, *args, **options):
+        departments = options['departments'] or SEED_SIZES[options['size']]
+        if departments < 1 or (options['users'] is not None and options['users'] < 1):
+            raise CommandError('--departments and --users must be positive.')
+
+        if options['clear']:
+            deleted = clear_seed_data()
+            self.stdout.write(f'Deleted {deleted} previously seeded rows.')
+
+        result = seed(departments, users=options['users'], batch_size=options['batch_size'],
+                      random_seed=options['seed'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {result.users} users and {result.departments} departments in {result.elapsed:.1f}s '
+            f'(password for seeded accounts: {SEED_PASSWORD!r}).'
+        ))
@@ -0,0 +1,175 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+from django.views.decorators.http import require_safe
+
+from .images import LOGO_DIR, logo_digest
+from .models import Department
+from .roles import resolve_role
+
+SENDFILE_MODES = ('x-accel-redirect', 'x-sendfile')
+DEFAULT_ACCEL_PREFIX = '/protected-media/'
+# Logos are stored under their SHA-256, so a given URL never changes content
+HASHED_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+UNHASHED_CACHE_CONTROL = 'private, no-cache'
+# The only types served inline; anything else is a download, so an uploaded
+# file can never be rendered as a page on this origin
+INLINE_CONTENT_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp'}
+# Larger files are streamed from disk instead of read into memory
+STREAM_THRESHOLD = 1024 * 1024
+
+_byte_range = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# -----------------------------
+# Permissions
+# -----------------------------
+def can_view_media(request, name):
+    """
+    Admins and owners see every logo; anyone else only logos (or their
+    variants) used by one of their own departments.
+    """
+    if not name.startswith(f'{LOGO_DIR}/'):
+        return False
+    role = resolve_role(request)
+    if role.can_view_all:
+        return True
+    digest = logo_digest(name)
+    used_by = Q(logo_path=name) | Q(logo_hash=digest) if digest else Q(logo_path=name)
+    return Department.objects.filter(used_by, owner=request.user).exists()
+
+
+# -----------------------------
+# Ranges
+# -----------------------------
+def parse_range(header, size):
+    """
+    (start, end) of a single `bytes=` range, inclusive, or None to send the
+    whole file (no header, several ranges, or a malformed one).
+    Raises ValueError when the range can't be satisfied.
+    """
+    match = _byte_range.match((header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError('Empty suffix range.')
+        return max(0, size - int(last)), size - 1
+    start, end = int(first), int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError('Range starts past the end of the file.')
+    return start, min(end, size - 1)
+
+
+def _range_allowed(request, etag, last_modified):
+    # If-Range: only send part of the file if the client's copy is current
+    if_range = request.headers.get('If-Range')
+    return if_range is None or if_range in (etag, http_date(last_modified))
+
+
+# -----------------------------
+# Serving
+# -----------------------------
+def sendfile_response(name, path, content_type):
+    """
+    Let the front-end server send the file (PARTNERSHIP_MEDIA_SENDFILE):
+    - 'x-accel-redirect' (nginx): internal location PARTNERSHIP_MEDIA_ACCEL_PREFIX
+      aliased to MEDIA_ROOT
+    - 'x-sendfile' (Apache mod_xsendfile, lighttpd): absolute path
+    The server handles Range itself. None when not configured.
+    """
+    mode = getattr(settings, 'PARTNERSHIP_MEDIA_SENDFILE', None)
+    if mode not in SENDFILE_MODES:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'PARTNERSHIP_MEDIA_ACCEL_PREFIX', DEFAULT_ACCEL_PREFIX)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def _file_response(path, content_type, start, length, size):
+    if length == size and size > STREAM_THRESHOLD:
+        return FileResponse(open(path, 'rb'), content_type=content_type)
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        return HttpResponse(handle.read(length), content_type=content_type)
+
+
+def serve_media(request, name):
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    stat = os.stat(path)
+
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = f'"{last_modified:x}-{size:x}"'
+    content_type = mimetypes.guess_type(path)[0]
+    inline = content_type in INLINE_CONTENT_TYPES
+    if not inline:
+        content_type = 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = sendfile_response(name, path, content_type)
+    if response is None:
+        start, end = 0, size - 1
+        try:
+            if _range_allowed(request, etag, last_modified):
+                start, end = parse_range(request.headers.get('Range'), size) or (start, end)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        length = max(0, end - start + 1)
+        response = _file_response(path, content_type, start, length, size)
+        if length != size:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = length
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = HASHED_CACHE_CONTROL if logo_digest(name) else UNHASHED_CACHE_CONTROL
+    response['X-Content-Type-Options'] = 'nosniff'
+    if not inline:
+        response['Content-Disposition'] = content_disposition_header(True, posixpath.basename(name))
+    return response
+
+
+@require_safe
+@login_required
+def media_view(request, path):
+    """
+    Uploaded media behind a permission check, with ETag/Last-Modified,
+    conditional and Range requests, or handed off via X-Accel-Redirect/X-Sendfile.
+    Only whitelisted image types are sent inline; everything else is an
+    application/octet-stream attachment, and nosniff is always set.
+    """
+    # Only canonical paths, so the permission check sees the file actually served;
+    # files the user may not see are reported missing rather than forbidden
+    if posixpath.normpath(path) != path or path.startswith('/') or not can_view_media(request, path):
+        raise Http404
+    return serve_media(request, path)
@@ -0,0 +1,225 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than PARTNERSHIP_QUERY_BUDGETS allows."""
+
+
+# -----------------------------
+# In-process histograms
+# -----------------------------
+class Histogram:
+    """Cumulative-bucket histogram per `view` label, safe to share between threads."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(view)
+            if series is None:
+                series = self._series[view] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            if index < len(self.buckets):
+                series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        with self._lock:
+            series = {view: dict(data, buckets=list(data['buckets'])) for view, data in self._series.items()}
+
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for view in sorted(series):
+            data = series[view]
+            label = _escape_label(view)
+            cumulative = 0
+            for bound, count in zip(self.buckets, data['buckets']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{view="{label}",le="+Inf"}} {data["count"]}')
+            lines.append(f'{self.name}_sum{{view="{label}"}} {data["sum"]}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {data["count"]}')
+        return lines
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = Histogram(
+    'partnership_request_duration_seconds', 'Wall time spent handling a request.', DURATION_BUCKETS)
+REQUEST_QUERIES = Histogram(
+    'partnership_request_queries', 'Database queries run while handling a request.', QUERY_BUCKETS)
+REQUEST_SQL_DURATION = Histogram(
+    'partnership_request_sql_duration_seconds', 'Time spent in the database per request.', DURATION_BUCKETS)
+HISTOGRAMS = [REQUEST_DURATION, REQUEST_QUERIES, REQUEST_SQL_DURATION]
+
+
+def render_metrics():
+    """All histograms in Prometheus text exposition format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
+
+
+# -----------------------------
+# Middleware
+# -----------------------------
+class QueryRecorder:
+    """Database execute wrapper that counts queries and sums their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# The recorder for the current request. A context variable rather than a
+# per-connection wrapper, so queries that async views run through
+# sync_to_async (on another thread's connection) are still counted.
+_active_recorder = ContextVar('partnership_query_recorder', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _active_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_recorder(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    _install_recorder(connection)
+
+
+@contextmanager
+def record_queries():
+    """Count the queries run inside the block, on any thread it hands work to."""
+    for connection in connections.all(initialized_only=True):
+        _install_recorder(connection)
+    recorder = QueryRecorder()
+    token = _active_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _active_recorder.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    Record wall time, query count and SQL time for every request, labelled
+    by the resolved URL name (`dashboard`, `department-list`, ...).
+    Runs natively under both WSGI and ASGI.
+
+    Settings:
+    - PARTNERSHIP_QUERY_BUDGETS: {url_name: max_queries} for views to police
+    - PARTNERSHIP_QUERY_BUDGET_ACTION: 'log' (default) or 'raise'
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = getattr(settings, 'PARTNERSHIP_QUERY_BUDGETS', {})
+        self.budget_action = getattr(settings, 'PARTNERSHIP_QUERY_BUDGET_ACTION', 'log')
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        self.observe(request, time.perf_counter() - start, recorder)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+        self.observe(request, time.perf_counter() - start, recorder)
+        return response
+
+    def observe(self, request, elapsed, recorder):
+        view = view_label(request)
+        REQUEST_DURATION.observe(view, elapsed)
+        REQUEST_QUERIES.observe(view, recorder.count)
+        REQUEST_SQL_DURATION.observe(view, recorder.duration)
+        self.check_budget(request, view, recorder.count)
+
+    def check_budget(self, request, view, count):
+        budget = self.budgets.get(view)
+        if budget is None or count <= budget:
+            return
+        message = f'{view} ran {count} queries (budget {budget}): {request.method} {request.get_full_path()}'
+        if self.budget_action == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    return match.url_name or match.view_name or UNRESOLVED_VIEW
+
+
+# -----------------------------
+# Endpoint
+# -----------------------------
+def metrics_view(request):
+    """
+    Prometheus scrape target. Open to superusers and to the addresses in
+    PARTNERSHIP_METRICS_IPS (default: localhost only).
+    """
+    allowed = getattr(settings, 'PARTNERSHIP_METRICS_IPS', ['127.0.0.1', '::1'])
+    if not (request.user.is_superuser or request.META.get('REMOTE_ADDR') in allowed):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partnership', '0003_rename_business_name_to_business_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='logo_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.17 on 2026-10-18 14:37
+
+from django.db import migrations, models
+
+# auth.User belongs to another app, so its email index is managed here
+USER_EMAIL_INDEX = models.Index(fields=['email'], name='auth_user_email_idx')
+
+
+def add_user_email_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), USER_EMAIL_INDEX)
+
+
+def remove_user_email_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), USER_EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('partnership', '0004_department_logo_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['partnership_status', 'department_name'], name='dept_status_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['department_name', 'id'], name='dept_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['last_updated', 'id'], name='dept_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['established_date'], name='dept_established_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(condition=models.Q(('partnership_status', 'active')), fields=['expiration_date'], name='dept_active_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['user_type'], name='profile_user_type_idx'),
+        ),
+        # login_view / signup_view / UserRegistrationForm look users up by email
+        migrations.RunPython(add_user_email_index, remove_user_email_index),
+    ]
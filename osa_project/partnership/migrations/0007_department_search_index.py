@@ -0,0 +1,24 @@
+# Generated by Django 4.2.17 on 2026-10-18 14:39
+
+from django.db import migrations
+
+from partnership.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partnership', '0006_taskcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
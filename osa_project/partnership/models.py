@@ -1,5 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .images import logo_variant_name
 
 # User profile to extend default User
 class UserProfile(models.Model):
@@ -17,6 +21,12 @@ class UserProfile(models.Model):
     user_type = models.CharField(max_length=20, choices=USER_TYPE_CHOICES, default='department')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Users API ?user_type= filter
+            models.Index(fields=['user_type'], name='profile_user_type_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.email} ({self.user_type})"
 
@@ -36,6 +46,8 @@ class Department(models.Model):
     contact_person = models.CharField(max_length=255, blank=True)
     contact_number = models.CharField(max_length=50, blank=True)
     logo_path = models.ImageField(upload_to='logos/', blank=True, null=True)
+    # Content hash of logo_path, set once its thumbnails have been generated
+    logo_hash = models.CharField(max_length=64, blank=True, editable=False)
     established_date = models.DateField(blank=True, null=True)
     expiration_date = models.DateField(blank=True, null=True)
     partnership_status = models.CharField(max_length=20, choices=PARTNERSHIP_STATUS_CHOICES, default='pending')
@@ -43,6 +55,21 @@ class Department(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Stats GROUP BY and status filter + default name sort
+            models.Index(fields=['partnership_status', 'department_name'], name='dept_status_name_idx'),
+            # Keyset pagination on name
+            models.Index(fields=['department_name', 'id'], name='dept_name_id_idx'),
+            # API cursor pagination and max(last_updated) for ETags
+            models.Index(fields=['last_updated', 'id'], name='dept_updated_id_idx'),
+            # DepartmentAdmin list_filter
+            models.Index(fields=['established_date'], name='dept_established_idx'),
+            # Expiry scans only ever look at active partnerships
+            models.Index(fields=['expiration_date'], name='dept_active_expiry_idx',
+                         condition=models.Q(partnership_status='active')),
+        ]
+
     def __str__(self):
         return f"{self.department_name} ({self.business_email})"
 
@@ -50,3 +77,83 @@ class Department(models.Model):
     def status_color(self):
         colors = {'active': 'green', 'inactive': 'red', 'pending': 'orange'}
         return colors.get(self.partnership_status, 'black')
+
+    def logo_url(self, variant):
+        """URL of a logo thumbnail, falling back to the original until it exists."""
+        if not self.logo_path:
+            return ''
+        if self.logo_hash:
+            return default_storage.url(logo_variant_name(self.logo_hash, variant))
+        return self.logo_path.url
+
+    @property
+    def logo_card_url(self):
+        return self.logo_url('card')
+
+    @property
+    def logo_detail_url(self):
+        return self.logo_url('detail')
+
+    @property
+    def logo_admin_url(self):
+        return self.logo_url('admin')
+
+
+# Progress marker for periodic jobs that work incrementally
+class TaskCheckpoint(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+# Record of a deleted department for the change feed (see changes.py)
+class DepartmentTombstone(models.Model):
+    department_id = models.BigIntegerField()
+    owner_id = models.BigIntegerField(blank=True, null=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Change feed seeks on (deleted_at, id)
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Department {self.department_id} deleted {self.deleted_at}"
+
+
+# Unit of background work for partnership.jobs (claimed by the run_jobs worker)
+class Job(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Claiming: due queued jobs, oldest first
+            models.Index(fields=['status', 'run_after', 'id'], name='job_status_run_after_idx'),
+            # Claim read-back and stale-lock recovery
+            models.Index(fields=['locked_by'], name='job_locked_by_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
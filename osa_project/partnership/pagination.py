@@ -0,0 +1,292 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+# -----------------------------
+# Cursor encoding
+# -----------------------------
+def encode_cursor(payload):
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return the decoded cursor payload, or None for a missing/garbled token."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+# -----------------------------
+# Keyset (seek) pagination
+# -----------------------------
+class ListPage:
+    """One page of a queryset plus the querystrings for its neighbours."""
+
+    def __init__(self, object_list, has_next, has_previous, next_querystring, previous_querystring):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_querystring = next_querystring
+        self.previous_querystring = previous_querystring
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def get_page_size(params):
+    default = getattr(settings, 'PARTNERSHIP_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    try:
+        size = int(params.get('per_page', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+class KeysetQuery:
+    """
+    The ordered, cursor-filtered queryset for one keyset page, and how to
+    turn the fetched rows into a ListPage. Shared by the sync and async paths.
+    """
+
+    def __init__(self, queryset, params, sort='id', cursor_param='cursor', per_page=None):
+        self.params = params
+        self.cursor_param = cursor_param
+        self.per_page = per_page or get_page_size(params)
+        descending = sort.startswith('-')
+        field_name = sort.lstrip('-')
+        self.field = queryset.model._meta.get_field(field_name)
+
+        cursor = decode_cursor(params.get(cursor_param))
+        if cursor:
+            try:
+                value = self.field.to_python(cursor['v'])
+                pk = int(cursor['id'])
+            except (KeyError, TypeError, ValueError, ValidationError):
+                cursor = None
+        self.cursor = cursor
+
+        self.backwards = bool(cursor) and cursor.get('d') == 'prev'
+        reverse = descending != self.backwards
+        prefix = '-' if reverse else ''
+        lookup = 'lt' if reverse else 'gt'
+
+        if field_name == 'id':
+            queryset = queryset.order_by(prefix + 'id')
+        else:
+            queryset = queryset.order_by(prefix + field_name, prefix + 'id')
+
+        if cursor:
+            if field_name == 'id':
+                queryset = queryset.filter(**{'id__' + lookup: pk})
+            else:
+                queryset = queryset.filter(
+                    Q(**{field_name + '__' + lookup: value}) |
+                    Q(**{field_name: value, 'id__' + lookup: pk})
+                )
+
+        # One extra row tells whether there is a page beyond this one
+        self.queryset = queryset[:self.per_page + 1]
+
+    def page(self, rows):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if self.backwards:
+            rows.reverse()
+
+        has_next = True if self.backwards else has_more
+        has_previous = has_more if self.backwards else bool(self.cursor)
+
+        def querystring(row, direction):
+            query = self.params.copy()
+            query[self.cursor_param] = encode_cursor({
+                'v': self.field.value_to_string(row),
+                'id': row.pk,
+                'd': direction,
+            })
+            return query.urlencode()
+
+        return ListPage(
+            rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_querystring=querystring(rows[-1], 'next') if rows else '',
+            previous_querystring=querystring(rows[0], 'prev') if rows else '',
+        )
+
+
+def keyset_paginate(queryset, params, sort='id', cursor_param='cursor', per_page=None):
+    """
+    Paginate `queryset` by seeking past the last row of the previous page:
+    - Rows are ordered by (sort field, id), so `id` breaks ties
+    - `sort` may start with '-' for descending order
+    - The cursor in `params[cursor_param]` holds the boundary row's values
+      and the direction, so every page is a single indexed range query
+    """
+    query = KeysetQuery(queryset, params, sort, cursor_param, per_page)
+    return query.page(list(query.queryset))
+
+
+async def akeyset_paginate(queryset, params, sort='id', cursor_param='cursor', per_page=None):
+    """keyset_paginate() for async views."""
+    query = KeysetQuery(queryset, params, sort, cursor_param, per_page)
+    return query.page([row async for row in query.queryset])
+
+
+def _offset_window(params, page_param, per_page):
+    per_page = per_page or get_page_size(params)
+    try:
+        number = max(1, int(params.get(page_param, 1)))
+    except (TypeError, ValueError):
+        number = 1
+    return number, per_page
+
+
+def _offset_page(rows, params, page_param, number, per_page):
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    def querystring(target):
+        query = params.copy()
+        query[page_param] = target
+        return query.urlencode()
+
+    return ListPage(
+        rows,
+        has_next=has_next,
+        has_previous=number > 1,
+        next_querystring=querystring(number + 1),
+        previous_querystring=querystring(number - 1),
+    )
+
+
+def offset_paginate(queryset, params, page_param='page', per_page=None):
+    """
+    Numbered pages for orderings that can't be seeked (e.g. search rank).
+    One extra row is fetched to detect a next page, so no COUNT is run.
+    """
+    number, per_page = _offset_window(params, page_param, per_page)
+    start = (number - 1) * per_page
+    rows = list(queryset[start:start + per_page + 1])
+    return _offset_page(rows, params, page_param, number, per_page)
+
+
+async def aoffset_paginate(queryset, params, page_param='page', per_page=None):
+    """offset_paginate() for async views."""
+    number, per_page = _offset_window(params, page_param, per_page)
+    start = (number - 1) * per_page
+    rows = [row async for row in queryset[start:start + per_page + 1]]
+    return _offset_page(rows, params, page_param, number, per_page)
+
+
+# -----------------------------
+# DRF pagination
+# -----------------------------
+class SeekCursorPagination(CursorPagination):
+    """
+    CursorPagination that seeks on the whole (field, id) ordering.
+    DRF's cursor only holds the first ordering field and pages through rows
+    sharing its value (e.g. many rows stamped by one bulk .update()) by
+    offset, which skips or repeats rows when data changes between requests.
+    Here the cursor holds the boundary row's value and id, and the next page
+    is one indexed range query past that pair, so no offset is ever needed.
+    `ordering` must be (field, id) with the same direction on both.
+    """
+    position_separator = '|'
+
+    def _get_position_from_instance(self, instance, ordering):
+        value = super()._get_position_from_instance(instance, ordering)
+        pk = instance['id'] if isinstance(instance, dict) else instance.pk
+        return f'{value}{self.position_separator}{pk}'
+
+    def _seek(self, queryset, position, reverse):
+        value, _, pk = position.rpartition(self.position_separator)
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        order = self.ordering[0]
+        field = order.lstrip('-')
+        # (cursor reversed) XOR (ordering descending)
+        lookup = 'lt' if reverse != order.startswith('-') else 'gt'
+        try:
+            return queryset.filter(Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk}))
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            queryset = self._seek(queryset, current_position, reverse)
+
+        # One extra row tells whether there is a page beyond this one
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position, self.previous_position = following_position, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class DepartmentCursorPagination(SeekCursorPagination):
+    """Cursor pagination for the departments API, newest changes first."""
+    ordering = ('-last_updated', '-id')
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'per_page'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class UserCursorPagination(SeekCursorPagination):
+    """Cursor pagination for the users API, newest accounts first."""
+    ordering = ('-date_joined', '-id')
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'per_page'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class SearchPagination(PageNumberPagination):
+    """Numbered pages for ranked search results."""
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'per_page'
+    max_page_size = MAX_PAGE_SIZE
@@ -1,13 +1,14 @@
 from rest_framework import permissions
 
+from .roles import resolve_role
+
+
 class IsAdminUser(permissions.BasePermission):
     """
     Custom permission to only allow admin users.
     """
     def has_permission(self, request, view):
-        # Check if user is authenticated via session
-        user_role = request.session.get('user_role')
-        return user_role == 'admin'
+        return resolve_role(request).is_admin
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -18,19 +19,14 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         # Read permissions are allowed to any authenticated user
         if request.method in permissions.SAFE_METHODS:
             return True
-        
+
         # Write permissions only for admin or owner
-        user_id = request.session.get('user_id')
-        user_role = request.session.get('user_role')
-        
-        if user_role == 'admin':
+        role = resolve_role(request)
+        if role.is_admin:
             return True
-        
+
         # Check if user owns the object
-        if hasattr(obj, 'user'):
-            return obj.user.user_id == user_id
-        
-        return False
+        return role.is_authenticated and getattr(obj, 'owner_id', None) == request.user.pk
 
 
 class IsAuthenticatedViaSession(permissions.BasePermission):
@@ -38,4 +34,11 @@ class IsAuthenticatedViaSession(permissions.BasePermission):
     Custom permission to check if user is authenticated via session.
     """
     def has_permission(self, request, view):
-        return 'user_id' in request.session
\ No newline at end of file
+        return bool(request.user and request.user.is_authenticated)
+
+class IsAdminOrOwnerRole(permissions.BasePermission):
+    """
+    Allow superusers and users whose profile is an admin or owner.
+    """
+    def has_permission(self, request, view):
+        return resolve_role(request).can_view_all
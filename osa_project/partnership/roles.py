@@ -0,0 +1,136 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.contrib.auth.models import User
+from django.utils.functional import SimpleLazyObject, cached_property
+
+from .models import UserProfile
+
+# Session keys used when PARTNERSHIP_ROLE_IN_SESSION is on
+SESSION_ROLE_KEY = 'user_role'
+SESSION_ROLE_USER_KEY = 'user_role_user_id'
+REQUEST_ROLE_ATTR = '_partnership_role'
+# Every value Role.cache_key can take
+ROLE_CACHE_KEYS = ['anonymous', 'superuser', 'admin', 'owner', 'department', 'none']
+
+
+class Role:
+    """
+    What the current user may do, resolved once per request:
+    - is_admin: superuser or an 'admin' profile (edit/delete anything)
+    - can_view_all: superuser, 'admin' or 'owner' profile (every department,
+      admin panel, exports, stats)
+    - is_owner / is_department: the plain profile types
+    """
+
+    def __init__(self, user, user_type=None):
+        self.user = user
+        self._user_type = user_type
+
+    @cached_property
+    def profile(self):
+        if not self.user.is_authenticated:
+            return None
+        try:
+            return self.user.profile
+        except UserProfile.DoesNotExist:
+            return None
+
+    @cached_property
+    def user_type(self):
+        if self._user_type is not None:
+            return self._user_type
+        return self.profile.user_type if self.profile else None
+
+    @property
+    def is_authenticated(self):
+        return self.user.is_authenticated
+
+    @property
+    def is_superuser(self):
+        return self.user.is_authenticated and self.user.is_superuser
+
+    @property
+    def is_admin(self):
+        return self.is_superuser or self.user_type == 'admin'
+
+    @property
+    def is_owner(self):
+        return self.user_type == 'owner'
+
+    @property
+    def is_department(self):
+        return self.user_type == 'department'
+
+    @property
+    def can_view_all(self):
+        return self.is_superuser or self.user_type in ('admin', 'owner')
+
+    @property
+    def cache_key(self):
+        """Short name for the role, used to vary cached fragments per kind of viewer."""
+        if not self.is_authenticated:
+            return 'anonymous'
+        if self.is_superuser:
+            return 'superuser'
+        return self.user_type or 'none'
+
+    def owns(self, department):
+        return self.user.is_authenticated and department.owner_id == self.user.pk
+
+
+# -----------------------------
+# Resolution
+# -----------------------------
+def _profile_loaded(user):
+    return User.profile.related.is_cached(user)
+
+
+def resolve_role(request):
+    """
+    Role for `request.user`, cached on the request (Django or DRF).
+    With PARTNERSHIP_ROLE_IN_SESSION the user type is also kept in the
+    session, so later requests skip the profile lookup entirely; a changed
+    user type then applies from the user's next login.
+    """
+    request = getattr(request, '_request', request)
+    role = getattr(request, REQUEST_ROLE_ATTR, None)
+    if role is not None:
+        return role
+
+    user = request.user
+    role = Role(user)
+    session = getattr(request, 'session', None)
+    use_session = (session is not None and user.is_authenticated
+                   and getattr(settings, 'PARTNERSHIP_ROLE_IN_SESSION', False))
+
+    if use_session and not _profile_loaded(user) and session.get(SESSION_ROLE_USER_KEY) == user.pk:
+        role = Role(user, user_type=session.get(SESSION_ROLE_KEY))
+    elif use_session:
+        session[SESSION_ROLE_KEY] = role.user_type
+        session[SESSION_ROLE_USER_KEY] = user.pk
+
+    setattr(request, REQUEST_ROLE_ATTR, role)
+    return role
+
+
+async def aresolve_role(request):
+    """resolve_role() for async views (loading request.user and the session is sync-only)."""
+    return await sync_to_async(resolve_role)(request)
+
+
+def alogin_required(view):
+    """login_required for async views (Django 4.2's decorator only wraps sync ones)."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not (await aresolve_role(request)).is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def role_context(request):
+    """Template context processor: {{ role.is_admin }}, {{ role.can_view_all }}, ..."""
+    return {'role': SimpleLazyObject(lambda: resolve_role(request))}
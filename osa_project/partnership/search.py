@@ -0,0 +1,118 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+SEARCH_TABLE = 'partnership_department_fts'
+SEARCH_COLUMNS = ['department_name', 'business_email', 'email', 'contact_person', 'remarks_status']
+# bm25 column weights, in SEARCH_COLUMNS order: name matches rank highest
+SEARCH_WEIGHTS = [10.0, 3.0, 3.0, 2.0, 1.0]
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+# External-content FTS5 table over partnership_department, kept in sync by
+# triggers so bulk_create/bulk_update/raw SQL writes are indexed too
+INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        {_columns},
+        content='partnership_department', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON partnership_department BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON partnership_department BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF {_columns} ON partnership_department BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+]
+REBUILD_SQL = f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"
+UNINSTALL_SQL = [
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_au',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+]
+TRIGGER_NAMES = [f'{SEARCH_TABLE}_ai', f'{SEARCH_TABLE}_ad', f'{SEARCH_TABLE}_au']
+
+
+# -----------------------------
+# Index maintenance
+# -----------------------------
+def search_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install_search_index(using=connection):
+    """
+    Create the FTS table and triggers if any are missing, then rebuild it.
+    SQLite drops triggers whenever a migration remakes partnership_department,
+    so this also runs after every migrate.
+    """
+    if not search_available(using) or 'partnership_department' not in using.introspection.table_names():
+        return False
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [SEARCH_TABLE] + TRIGGER_NAMES,
+        )
+        if len(cursor.fetchall()) == len(TRIGGER_NAMES) + 1:
+            return False
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
+        cursor.execute(REBUILD_SQL)
+    return True
+
+
+def uninstall_search_index(using=connection):
+    if not search_available(using):
+        return
+    with using.cursor() as cursor:
+        for statement in UNINSTALL_SQL:
+            cursor.execute(statement)
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match as a prefix.
+    Words are quoted, so FTS syntax in user input is treated as text.
+    """
+    words = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_departments(queryset, text):
+    """
+    Restrict a Department queryset to rows matching `text`, best match first.
+    Uses the FTS5 index with bm25 ranking on SQLite; other databases fall
+    back to case-insensitive substring matching.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset.none()
+
+    if not search_available():
+        words = re.findall(r'\w+', text)
+        for word in words:
+            condition = Q()
+            for column in SEARCH_COLUMNS:
+                condition |= Q(**{f'{column}__icontains': word})
+            queryset = queryset.filter(condition)
+        return queryset.order_by('department_name', 'id')
+
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    return queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[f'{SEARCH_TABLE}.rowid = partnership_department.id', f'{SEARCH_TABLE} MATCH %s'],
+        params=[match],
+        select={'search_rank': f'bm25({SEARCH_TABLE}, {weights})'},
+        order_by=['search_rank', 'id'],
+    )
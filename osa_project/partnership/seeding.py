@@ -0,0 +1,159 @@
+import datetime
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Department, UserProfile
+from .signals import departments_bulk_changed
+
+SEED_PREFIX = 'seed-'
+SEED_PASSWORD = 'seed-password'
+SEED_ADMIN_USERNAME = f'{SEED_PREFIX}admin'
+SEED_SIZES = {'small': 10_000, 'medium': 100_000, 'large': 1_000_000}
+DEFAULT_BATCH_SIZE = 5000
+# One seeded user per this many departments
+DEPARTMENTS_PER_USER = 10
+
+# user_type mix for seeded users: mostly department accounts
+USER_TYPE_WEIGHTS = {'department': 90, 'owner': 8, 'admin': 2}
+STATUS_WEIGHTS = {'active': 60, 'pending': 25, 'inactive': 15}
+
+_SUBJECTS = [
+    'Computer Science', 'Civil Engineering', 'Nursing', 'Accountancy', 'Marine Biology',
+    'Architecture', 'Education', 'Psychology', 'Tourism', 'Criminology', 'Fine Arts',
+    'Information Technology', 'Mechanical Engineering', 'Pharmacy', 'Political Science',
+]
+_KINDS = ['Department', 'Institute', 'Center', 'Laboratory', 'Office', 'Program']
+_FIRST_NAMES = ['Ana', 'Ben', 'Carla', 'Dan', 'Elena', 'Felix', 'Gina', 'Hugo', 'Iris', 'Jon', 'Kai', 'Lea']
+_LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos']
+_REMARKS = [
+    '', '', 'Renewal under review', 'Awaiting signed MOA', 'Internship slots confirmed',
+    'Joint research agreement', 'Follow up with the dean', 'Scholarship program partner',
+]
+
+
+class SeedResult:
+    def __init__(self):
+        self.users = 0
+        self.departments = 0
+        self.elapsed = 0.0
+
+
+# -----------------------------
+# Row factories
+# -----------------------------
+def _person(rng):
+    return f'{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}'
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _next_seed_number():
+    return User.objects.filter(username__startswith=SEED_PREFIX).count()
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(batch_size, total - start)
+
+
+# -----------------------------
+# Seeding
+# -----------------------------
+def seed_users(count, rng, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Bulk insert `count` users with profiles and return their ids. Every
+    seeded user shares one precomputed password hash (SEED_PASSWORD).
+    """
+    password = make_password(SEED_PASSWORD)
+    first = _next_seed_number()
+    owner_ids = []
+
+    for start, size in _batches(count, batch_size):
+        users = []
+        for n in range(first + start, first + start + size):
+            users.append(User(username=f'{SEED_PREFIX}user-{n}', email=f'seed{n}@example.com',
+                              password=password, is_active=True))
+        with transaction.atomic():
+            users = User.objects.bulk_create(users, batch_size=batch_size)
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, business_email=user.email,
+                            department_name=f'{rng.choice(_SUBJECTS)} {rng.choice(_KINDS)}',
+                            contact_person=_person(rng), contact_number=f'09{rng.randrange(10**9):09d}',
+                            user_type=_weighted(rng, USER_TYPE_WEIGHTS))
+                for user in users
+            ], batch_size=batch_size)
+        owner_ids.extend(user.pk for user in users)
+
+    return owner_ids
+
+
+def seed_departments(count, owner_ids, rng, batch_size=DEFAULT_BATCH_SIZE):
+    """Bulk insert `count` departments spread over `owner_ids`."""
+    today = datetime.date.today()
+
+    for start, size in _batches(count, batch_size):
+        departments = []
+        for n in range(start, start + size):
+            established = today - datetime.timedelta(days=rng.randrange(3650))
+            slug = f'dept{n}'
+            departments.append(Department(
+                owner_id=rng.choice(owner_ids),
+                department_name=f'{rng.choice(_SUBJECTS)} {rng.choice(_KINDS)} {n}',
+                business_email=f'{slug}@partners.example.com',
+                email=f'{slug}@example.edu',
+                contact_person=_person(rng),
+                contact_number=f'02{rng.randrange(10**8):08d}',
+                established_date=established,
+                expiration_date=established + datetime.timedelta(days=rng.choice([365, 730, 1825])),
+                partnership_status=_weighted(rng, STATUS_WEIGHTS),
+                remarks_status=rng.choice(_REMARKS),
+            ))
+        with transaction.atomic():
+            created = Department.objects.bulk_create(departments, batch_size=batch_size)
+            departments_bulk_changed.send(sender=Department, departments=created, action='created')
+
+
+def ensure_seed_admin():
+    """The superuser benchmarks log in as (password SEED_PASSWORD)."""
+    user, created = User.objects.get_or_create(
+        username=SEED_ADMIN_USERNAME,
+        defaults={'email': 'seed-admin@example.com', 'is_staff': True, 'is_superuser': True},
+    )
+    if created:
+        user.set_password(SEED_PASSWORD)
+        user.save(update_fields=['password'])
+        UserProfile.objects.create(user=user, business_email=user.email, department_name='Administration',
+                                   contact_person='Seed Admin', contact_number='0000', user_type='admin')
+    return user
+
+
+def seed(departments, users=None, batch_size=DEFAULT_BATCH_SIZE, random_seed=0):
+    """
+    Insert `departments` departments and `users` users (default: one per
+    DEPARTMENTS_PER_USER departments). The same random_seed gives the same data.
+    """
+    rng = random.Random(random_seed)
+    users = users if users is not None else max(1, departments // DEPARTMENTS_PER_USER)
+    result = SeedResult()
+    start = time.perf_counter()
+
+    ensure_seed_admin()
+    owner_ids = seed_users(users, rng, batch_size)
+    seed_departments(departments, owner_ids, rng, batch_size)
+
+    result.users = len(owner_ids)
+    result.departments = departments
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def clear_seed_data():
+    """Delete every seeded user; their profiles and departments cascade."""
+    deleted, _ = User.objects.filter(username__startswith=SEED_PREFIX).delete()
+    return deleted
@@ -1,11 +1,41 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from .images import LOGO_VARIANTS
 from .models import Department, UserProfile
 
+
+# -----------------------------
+# Sparse fieldsets
+# -----------------------------
+class SparseFieldsMixin:
+    """
+    Let read requests pick the returned fields with ?fields=a,b,c.
+    Unknown names are ignored; an empty selection keeps every field.
+    """
+    fields_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        selected = self.requested_fields(request)
+        if selected:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Return the valid field names asked for in the query string, or None."""
+        raw = request.query_params.get(cls.fields_param, '')
+        names = [name.strip() for name in raw.split(',') if name.strip()]
+        selected = [name for name in names if name in cls.Meta.fields]
+        return selected or None
+
 # -----------------------------
 # User Serializer
 # -----------------------------
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     profile = serializers.SerializerMethodField()
 
     class Meta:
@@ -13,15 +43,18 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'profile']
 
     def get_profile(self, obj):
-        if hasattr(obj, 'profile'):
-            return {
-                'business_email': obj.profile.business_email,
-                'department_name': obj.profile.department_name,
-                'contact_person': obj.profile.contact_person,
-                'contact_number': obj.profile.contact_number,
-                'user_type': obj.profile.user_type,
-            }
-        return {}
+        # Querysets join the profile (select_related), so this is a cache hit
+        try:
+            profile = obj.profile
+        except UserProfile.DoesNotExist:
+            return {}
+        return {
+            'business_email': profile.business_email,
+            'department_name': profile.department_name,
+            'contact_person': profile.contact_person,
+            'contact_number': profile.contact_number,
+            'user_type': profile.user_type,
+        }
 
 # -----------------------------
 # User Create Serializer
@@ -58,13 +91,35 @@ class UserCreateSerializer(serializers.ModelSerializer):
 # -----------------------------
 # Department Serializer
 # -----------------------------
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user_email = serializers.EmailField(source='owner.email', read_only=True)
     status_color = serializers.CharField(read_only=True)
+    logo_urls = serializers.SerializerMethodField()
+
+    # Model columns behind serializer fields that aren't plain columns
+    field_columns = {
+        'owner': ['owner'],
+        'user_email': ['owner', 'owner__email'],
+        'status_color': ['partnership_status'],
+        'logo_urls': ['logo_path', 'logo_hash'],
+    }
 
     class Meta:
         model = Department
         fields = ['id', 'owner', 'user_email', 'department_name', 'business_email',
-                  'email', 'logo_path', 'established_date', 'expiration_date',
+                  'email', 'logo_path', 'logo_urls', 'established_date', 'expiration_date',
                   'partnership_status', 'status_color', 'remarks_status', 'created_at', 'last_updated']
         read_only_fields = ['id', 'created_at', 'last_updated']
+
+    def get_logo_urls(self, obj):
+        if not obj.logo_path:
+            return None
+        return {variant: obj.logo_url(variant) for variant in LOGO_VARIANTS}
+
+    @classmethod
+    def columns_for(cls, field_names):
+        """Model columns needed to render `field_names` (always with id/last_updated for paging)."""
+        columns = {'id', 'last_updated'}
+        for name in field_names:
+            columns.update(cls.field_columns.get(name, [name]))
+        return sorted(columns)
@@ -0,0 +1,157 @@
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .deletion import release_logo
+from .events import broadcaster, department_event_data
+from .fragments import invalidate_department_cards
+from .models import Department, DepartmentTombstone
+from .search import install_search_index
+from .stats import invalidate_stats
+
+# Sent after bulk_create/bulk_update on Department, which skip post_save.
+# Arguments: departments (list of instances), action ('created' or 'updated')
+departments_bulk_changed = Signal()
+
+
+# -----------------------------
+# Stats cache invalidation
+# -----------------------------
+@receiver(post_save, sender=Department)
+def department_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Saves that don't touch the status can't change the counters
+    if created or update_fields is None or 'partnership_status' in update_fields:
+        transaction.on_commit(invalidate_stats)
+
+
+@receiver(post_delete, sender=Department)
+def department_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_stats)
+
+
+@receiver(departments_bulk_changed, sender=Department)
+def departments_bulk_changed_stats(sender, departments, action, **kwargs):
+    transaction.on_commit(invalidate_stats)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    # Only new accounts change the user count (logins also save the user)
+    if created:
+        transaction.on_commit(invalidate_stats)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_stats)
+
+
+# -----------------------------
+# Owner changes
+# -----------------------------
+@receiver(pre_save, sender=User)
+def user_remember_email(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only; skip the lookup unless the email may have changed
+    if instance.pk and (update_fields is None or 'email' in update_fields):
+        instance._previous_email = User.objects.filter(pk=instance.pk).values_list('email', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def user_email_changed(sender, instance, created, **kwargs):
+    # Departments render their owner's email: bump them so ETags, cached
+    # cards and the change feed all see the new version
+    previous = instance.__dict__.pop('_previous_email', None)
+    if not created and previous is not None and previous != instance.email:
+        Department.objects.filter(owner_id=instance.pk).update(last_updated=timezone.now())
+
+
+# -----------------------------
+# Department card fragment cache
+# -----------------------------
+@receiver(pre_save, sender=Department)
+def department_remember_version(sender, instance, **kwargs):
+    # auto_now replaces last_updated during save; keep the version the cached cards were keyed on
+    instance._cached_card_version = instance.last_updated if instance.pk else None
+
+
+@receiver(post_save, sender=Department)
+def department_saved_cards(sender, instance, **kwargs):
+    version = getattr(instance, '_cached_card_version', None)
+    transaction.on_commit(lambda: invalidate_department_cards(instance.pk, version))
+
+
+@receiver(post_delete, sender=Department)
+def department_deleted_cards(sender, instance, **kwargs):
+    pk, version = instance.pk, instance.last_updated
+    transaction.on_commit(lambda: invalidate_department_cards(pk, version))
+
+
+# -----------------------------
+# Change feed tombstones
+# -----------------------------
+@receiver(post_delete, sender=Department)
+def department_tombstone(sender, instance, **kwargs):
+    # Also runs for cascades (e.g. deleting the owner), in the same transaction
+    DepartmentTombstone.objects.create(department_id=instance.pk, owner_id=instance.owner_id)
+
+
+# -----------------------------
+# Live admin panel events
+# -----------------------------
+# Registered after the stats receivers, so by the time an event goes out
+# on commit the stats cache has already been invalidated
+def _publish_on_commit(event_type, data):
+    transaction.on_commit(lambda: broadcaster.publish(event_type, data))
+
+
+@receiver(post_save, sender=Department)
+def department_saved_event(sender, instance, created, **kwargs):
+    _publish_on_commit('department.created' if created else 'department.updated', department_event_data(instance))
+
+
+@receiver(post_delete, sender=Department)
+def department_deleted_event(sender, instance, **kwargs):
+    _publish_on_commit('department.deleted', {'id': instance.pk})
+
+
+@receiver(departments_bulk_changed, sender=Department)
+def departments_bulk_changed_event(sender, departments, action, **kwargs):
+    _publish_on_commit('departments.changed', {'action': action, 'count': len(departments)})
+
+
+@receiver(post_save, sender=User)
+def user_saved_event(sender, instance, created, **kwargs):
+    if created:
+        _publish_on_commit('user.created', {'id': instance.pk})
+
+
+@receiver(post_delete, sender=User)
+def user_deleted_event(sender, instance, **kwargs):
+    _publish_on_commit('user.deleted', {'id': instance.pk})
+
+
+# -----------------------------
+# Logo files
+# -----------------------------
+# Files are removed by a queued job after commit, once no other
+# department uses them (see deletion.delete_unreferenced_logos)
+@receiver(post_save, sender=Department)
+def department_logo_replaced(sender, instance, **kwargs):
+    release_logo(instance.__dict__.pop('_replaced_logo', None))
+
+
+@receiver(post_delete, sender=Department)
+def department_logo_deleted(sender, instance, **kwargs):
+    release_logo(instance.logo_path.name if instance.logo_path else None)
+
+
+# -----------------------------
+# Full-text search index
+# -----------------------------
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    # Table remakes during migrations drop the FTS triggers; put them back
+    if sender.name == 'partnership':
+        install_search_index(connections[using])
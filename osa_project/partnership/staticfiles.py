@@ -0,0 +1,184 @@
+import gzip
+import mimetypes
+import os
+import re
+from urllib.parse import unquote, urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+# Text assets worth compressing; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico'}
+MIN_COMPRESS_SIZE = 256
+# Hashed names never change content, so clients may keep them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_STATIC_MAX_AGE = 60
+# Larger files are streamed from disk instead of read into memory
+STREAM_THRESHOLD = 1024 * 1024
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+# -----------------------------
+# Collect time
+# -----------------------------
+def compress_bytes(data):
+    """gzip `data` reproducibly, or None when it isn't worth it."""
+    if len(data) < MIN_COMPRESS_SIZE:
+        return None
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    return compressed if len(compressed) < len(data) * 0.95 else None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes `<hashed name>.gz` next to
+    every hashed text asset, for StaticFilesMiddleware to send as-is.
+    Until collectstatic has run (development, tests) names missing from the
+    manifest resolve to their plain URL instead of raising.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in sorted(set(self.hashed_files.values())):
+            compressed_name = self.compress(hashed_name)
+            if compressed_name:
+                yield hashed_name, compressed_name, True
+
+    def compress(self, name):
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return None
+        with self.open(name) as original:
+            compressed = compress_bytes(original.read())
+        if compressed is None:
+            return None
+        compressed_name = f'{name}.gz'
+        if self.exists(compressed_name):
+            self.delete(compressed_name)
+        self._save(compressed_name, ContentFile(compressed))
+        return compressed_name
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+# -----------------------------
+# Serving
+# -----------------------------
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.last_modified = stat.st_mtime
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        self.immutable = immutable
+        self.compressed_path = f'{path}.gz' if os.path.isfile(f'{path}.gz') else None
+
+
+class StaticFilesMiddleware:
+    """
+    Serve STATIC_ROOT directly, ahead of sessions and views:
+    - Hashed names from the manifest get immutable, year-long caching;
+      anything else PARTNERSHIP_STATIC_MAX_AGE seconds (default 60)
+    - The precompressed .gz copy is sent when the client accepts gzip
+    - ETag / Last-Modified revalidation answers 304 with no body
+    Files that aren't in STATIC_ROOT fall through to the rest of the stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = urlsplit(settings.STATIC_URL or '').path
+        self.root = settings.STATIC_ROOT
+        self.max_age = getattr(settings, 'PARTNERSHIP_STATIC_MAX_AGE', DEFAULT_STATIC_MAX_AGE)
+        # Files only change on deploy; in DEBUG, look them up every time
+        self.cache_lookups = not settings.DEBUG
+        self._files = {}
+        self._immutable = None
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        static_file = self.find(request.path_info)
+        if static_file is None:
+            return self.get_response(request)
+        return self.serve(request, static_file)
+
+    async def __acall__(self, request):
+        # Lookups are cached stats and files are small, so this doesn't hop threads
+        static_file = self.find(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        return self.serve(request, static_file)
+
+    @property
+    def immutable_names(self):
+        if self._immutable is None:
+            self._immutable = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        return self._immutable
+
+    def find(self, path):
+        if not self.root or not self.prefix or not path.startswith(self.prefix):
+            return None
+        if path in self._files:
+            return self._files[path]
+
+        name = unquote(path[len(self.prefix):])
+        try:
+            full_path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        static_file = StaticFile(full_path, name in self.immutable_names) if os.path.isfile(full_path) else None
+        if self.cache_lookups:
+            self._files[path] = static_file
+        return static_file
+
+    def serve(self, request, static_file):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+        path, encoding = static_file.path, None
+        if static_file.compressed_path and _accepts_gzip.search(request.headers.get('Accept-Encoding', '')):
+            path, encoding = static_file.compressed_path, 'gzip'
+        etag = static_file.etag if encoding is None else f'{static_file.etag[:-1]}-gz"'
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=int(static_file.last_modified))
+        if not_modified is None:
+            size = os.path.getsize(path)
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=static_file.content_type)
+            elif size > STREAM_THRESHOLD:
+                response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            else:
+                with open(path, 'rb') as handle:
+                    response = HttpResponse(handle.read(), content_type=static_file.content_type)
+            response['Content-Length'] = size
+        else:
+            response = not_modified
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(static_file.last_modified)
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if static_file.immutable else f'public, max-age={self.max_age}'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if static_file.compressed_path:
+            response['Vary'] = 'Accept-Encoding'
+        return response
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Department
+
+STATS_CACHE_KEY = 'partnership:stats'
+
+
+# -----------------------------
+# Partnership statistics
+# -----------------------------
+def compute_stats():
+    """
+    Compute the partnership counters from the database:
+    - One grouped query for the per-status department counts
+    - One COUNT for the users table
+    """
+    return _stats(list(_status_counts()), User.objects.count())
+
+
+async def acompute_stats():
+    """compute_stats() for async views."""
+    # Django 4.2 runs async ORM calls one at a time on the shared sync
+    # thread, so the queries are simply awaited in turn
+    rows = [row async for row in _status_counts()]
+    return _stats(rows, await User.objects.acount())
+
+
+def _status_counts():
+    return (Department.objects.order_by()
+            .values_list('partnership_status')
+            .annotate(total=Count('id')))
+
+
+def _stats(status_rows, total_users):
+    by_status = {status: 0 for status, _ in Department.PARTNERSHIP_STATUS_CHOICES}
+    for status, total in status_rows:
+        by_status[status] = total
+
+    return {
+        'total_departments': sum(by_status.values()),
+        'active_partnerships': by_status['active'],
+        'pending_partnerships': by_status['pending'],
+        'inactive_partnerships': by_status['inactive'],
+        'by_status': by_status,
+        'total_users': total_users,
+    }
+
+
+def get_stats():
+    """
+    Return the cached counters, computing them on a cache miss.
+    The entry is dropped by the signal handlers whenever a Department or
+    User changes; the timeout only bounds staleness across processes.
+    """
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_stats()
+        cache.set(STATS_CACHE_KEY, stats, getattr(settings, 'PARTNERSHIP_STATS_CACHE_TIMEOUT', 300))
+    return stats
+
+
+async def aget_stats():
+    """get_stats() for async views."""
+    stats = await cache.aget(STATS_CACHE_KEY)
+    if stats is None:
+        stats = await acompute_stats()
+        await cache.aset(STATS_CACHE_KEY, stats, getattr(settings, 'PARTNERSHIP_STATS_CACHE_TIMEOUT', 300))
+    return stats
+
+
+def invalidate_stats():
+    cache.delete(STATS_CACHE_KEY)
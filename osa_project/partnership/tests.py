@@ -1,3 +1,1407 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from urllib.parse import urlencode
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.contrib.auth import authenticate
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import QueryDict
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.templatetags.static import static
+from django.utils import timezone
+from PIL import Image
+
+from .changes import changes_since
+from .conditional import list_validators
+from .deletion import collect_orphaned_logos, delete_user, purge_user
+from .exports import DEPARTMENT_EXPORT_FIELDS, EXPORT_FORMATS
+from .events import Broadcaster, broadcaster, event_stream
+from .database import apply_sqlite_pragmas, sqlite_pragma_values
+from .expiration import expire_partnerships, expired_departments
+from .fragments import department_card_keys, fragment_cache_alias
+from .images import LOGO_VARIANTS, generate_logo_variants, logo_variant_name, store_logo
+from .importers import import_departments
+from .jobs import Worker, claim_jobs, heartbeat, requeue_stale_jobs, run_job, task
+from .backends import EmailBackend, with_landing_department
+from .batch import batch_update_departments
+from .benchmark import run_benchmark
+from .metrics import QueryBudgetExceeded
+from .pagination import encode_cursor, keyset_paginate
+from .models import Department, DepartmentTombstone, Job, UserProfile
+from .roles import resolve_role
+from .search import search_departments
+from .seeding import seed
+from .staticfiles import IMMUTABLE_CACHE_CONTROL
+from .stats import compute_stats, get_stats
+
+
+# -----------------------------
+# Admin panel stats
+# -----------------------------
+class StatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        for status in ('active', 'active', 'pending', 'inactive'):
+            Department.objects.create(owner=cls.user, department_name=status, partnership_status=status,
+                                      business_email='biz@example.com', email='dept@example.com')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts(self):
+        with self.assertNumQueries(2):
+            stats = compute_stats()
+        self.assertEqual(stats['total_departments'], Department.objects.count())
+        self.assertEqual(stats['by_status'], {'active': 2, 'inactive': 1, 'pending': 1})
+        self.assertEqual(stats['active_partnerships'], 2)
+        self.assertEqual(stats['total_users'], User.objects.count())
+
+    def test_cached_until_save_or_delete(self):
+        get_stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_stats()['pending_partnerships'], 1)
+
+        department = Department.objects.get(partnership_status='pending')
+        with self.captureOnCommitCallbacks(execute=True):
+            department.partnership_status = 'active'
+            department.save()
+        self.assertEqual(get_stats()['active_partnerships'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            department.delete()
+        stats = get_stats()
+        self.assertEqual((stats['active_partnerships'], stats['total_departments']), (2, 3))
+
+
+# -----------------------------
+# Keyset pagination
+# -----------------------------
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        # Names repeat, so pages split runs of equal sort values
+        for i in range(11):
+            Department.objects.create(owner=cls.user, department_name=f'Dept {i % 3}',
+                                      business_email='biz@example.com', email='dept@example.com')
+
+    def walk(self, sort, per_page=4):
+        seen, params = [], QueryDict(mutable=True)
+        while True:
+            page = keyset_paginate(Department.objects.all(), params, sort=sort, per_page=per_page)
+            seen.append([department.pk for department in page])
+            if not page.has_next:
+                return seen, page
+            params = QueryDict(page.next_querystring)
+
+    def test_forward_no_duplicates_or_gaps(self):
+        expected = list(Department.objects.order_by('department_name', 'id').values_list('id', flat=True))
+        pages, _ = self.walk('department_name')
+        self.assertEqual([len(page) for page in pages], [4, 4, 3])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_descending(self):
+        expected = list(Department.objects.order_by('-department_name', '-id').values_list('id', flat=True))
+        pages, _ = self.walk('-department_name')
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_pages(self):
+        pages, last = self.walk('department_name')
+        back = keyset_paginate(Department.objects.all(), QueryDict(last.previous_querystring),
+                               sort='department_name', per_page=4)
+        self.assertEqual([department.pk for department in back], pages[1])
+        self.assertTrue(back.has_next)
+        first = keyset_paginate(Department.objects.all(), QueryDict(back.previous_querystring),
+                                sort='department_name', per_page=4)
+        self.assertEqual([department.pk for department in first], pages[0])
+        self.assertFalse(first.has_previous)
+
+    def test_tampered_cursor_starts_over(self):
+        first = keyset_paginate(Department.objects.all(), QueryDict(), sort='department_name', per_page=4)
+        bad_id = encode_cursor({'v': 'Dept 1', 'id': 'x', 'd': 'next'})
+        for cursor in ('garbage!!', encode_cursor(['v']), bad_id):
+            page = keyset_paginate(Department.objects.all(), QueryDict(urlencode({'cursor': cursor})),
+                                   sort='department_name', per_page=4)
+            self.assertEqual(list(page), list(first))
+            self.assertFalse(page.has_previous)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/partnership/dashboard/', {'cursor': 'garbage!!'}).status_code, 200)
+
+
+# -----------------------------
+# Departments API pagination
+# -----------------------------
+class DepartmentApiTests(TestCase):
+    URL = '/partnership/api/departments/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        owners = [User.objects.create_user(f'owner{i}', f'owner{i}@example.com', 'password') for i in range(3)]
+        for i in range(6):
+            Department.objects.create(owner=owners[i % 3], department_name=f'Dept {i}',
+                                      business_email='biz@example.com', email='dept@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def department_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), [q['sql'] for q in queries if 'FROM "partnership_department"' in q['sql']]
+
+    def test_owner_joined_in_one_query(self):
+        data, queries = self.department_queries({'per_page': 6})
+        page_queries = [sql for sql in queries if 'LIMIT' in sql]
+        self.assertEqual(len(page_queries), 1)
+        self.assertIn('INNER JOIN "auth_user"', page_queries[0])
+        self.assertEqual({row['user_email'] for row in data['results']},
+                         {'owner0@example.com', 'owner1@example.com', 'owner2@example.com'})
+
+    def test_query_count_independent_of_page_size(self):
+        # Session, user, the two list validator aggregates, the page itself
+        for per_page in (2, 6):
+            with self.assertNumQueries(5):
+                self.client.get(self.URL, {'per_page': per_page})
+
+    def test_sparse_fields_skip_join(self):
+        data, queries = self.department_queries({'fields': 'id,department_name'})
+        self.assertEqual(set(data['results'][0]), {'id', 'department_name'})
+        self.assertFalse(any('auth_user' in sql for sql in queries if 'LIMIT' in sql))
+
+    def test_cursor_pages(self):
+        first = self.client.get(self.URL, {'per_page': 4}).json()
+        second = self.client.get(first['next']).json()
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(sorted(ids), sorted(Department.objects.values_list('id', flat=True)))
+        self.assertIsNone(second['next'])
+
+    def test_cursor_seeks_past_shared_timestamps(self):
+        # A bulk update stamps every row with one last_updated
+        Department.objects.update(last_updated=timezone.now())
+        expected = list(Department.objects.order_by('-id').values_list('id', flat=True))
+        pages, url, params = [], self.URL, {'per_page': 2}
+        while url:
+            data = self.client.get(url, params).json()
+            pages.append(data)
+            url, params = data['next'], None
+        self.assertEqual([row['id'] for page in pages for row in page['results']], expected)
+
+        # Rows changing between requests are neither skipped nor repeated
+        second = self.client.get(pages[0]['next']).json()
+        Department.objects.filter(id=expected[0]).delete()
+        self.assertEqual([row['id'] for row in second['results']], expected[2:4])
+        self.assertEqual(self.client.get(pages[1]['next']).json()['results'],
+                         pages[2]['results'])
+
+        # Paging backwards seeks too
+        previous = self.client.get(pages[2]['previous']).json()
+        self.assertEqual([row['id'] for row in previous['results']], expected[2:4])
+
+
+# -----------------------------
+# Users API
+# -----------------------------
+class UserApiTests(TestCase):
+    URL = '/partnership/api/users/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        for i, user_type in enumerate(['department', 'department', 'owner', 'admin']):
+            user = User.objects.create_user(f'user{i}', f'user{i}@example.com', 'password')
+            UserProfile.objects.create(user=user, business_email=user.email, department_name=f'Dept {i}',
+                                       contact_person='Contact', contact_number='0000', user_type=user_type)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_role_filter(self):
+        results = self.client.get(self.URL, {'user_type': 'department'}).json()['results']
+        self.assertEqual(sorted(row['username'] for row in results), ['user0', 'user1'])
+        self.assertEqual({row['profile']['user_type'] for row in results}, {'department'})
+        # Unknown roles don't filter
+        self.assertEqual(len(self.client.get(self.URL, {'user_type': 'bogus'}).json()['results']), 5)
+
+    def test_profile_joined(self):
+        # Session, user, the page with profiles joined; nothing per row
+        with self.assertNumQueries(3):
+            results = self.client.get(self.URL).json()['results']
+        self.assertEqual(len(results), 5)
+        self.assertEqual({row['username']: row['profile'] for row in results}['admin'], {})
+
+    def test_permissions(self):
+        target = f'{self.URL}{self.admin.pk}/'
+        department_user = User.objects.get(username='user0')
+        owner = User.objects.get(username='user2')
+        for user, reads, writes in [(None, 403, 403), (department_user, 403, 403), (owner, 200, 403)]:
+            with self.subTest(user=user and user.username):
+                self.client.logout()
+                if user:
+                    self.client.force_login(user)
+                self.assertEqual(self.client.get(self.URL).status_code, reads)
+                self.assertEqual(self.client.get(target).status_code, reads)
+                self.assertEqual(self.client.patch(target, {'email': 'x@example.com'},
+                                                   content_type='application/json').status_code, writes)
+                self.assertEqual(self.client.delete(target).status_code, writes)
+                self.assertEqual(self.client.post(self.URL, {}).status_code, writes)
+        self.assertEqual(User.objects.get(pk=self.admin.pk).email, 'admin@example.com')
+
+        self.client.force_login(User.objects.get(username='user3'))
+        response = self.client.patch(f'{self.URL}{department_user.pk}/', {'email': 'new@example.com'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        # Viewsets without their own permissions fall back to the authenticated-only default
+        self.client.logout()
+        self.assertEqual(self.client.get('/partnership/api/departments/').status_code, 403)
+
+
+# -----------------------------
+# Bulk import
+# -----------------------------
+class ImportTests(TestCase):
+    URL = '/partnership/api/departments/import/'
+    HEADER = 'department_name,business_email,email,partnership_status\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def upload(self, name, content):
+        return self.client.post(self.URL, {'file': SimpleUploadedFile(name, content)})
+
+    def test_csv(self):
+        content = (self.HEADER + 'Alpha,a@example.com,a@example.com,active\n'
+                   'Beta,b@example.com,b@example.com,\n').encode('utf-8-sig')
+        response = self.upload('departments.csv', content)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(Department.objects.get(department_name='Beta').partnership_status, 'pending')
+        self.assertEqual(Department.objects.get(department_name='Alpha').owner, self.user)
+
+    def test_ndjson(self):
+        content = b'{"department_name": "Alpha", "business_email": "a@example.com", "email": "a@example.com"}\n\n' \
+                  b'{"department_name": "Beta", "business_email": "b@example.com", "email": "b@example.com", ' \
+                  b'"owner_email": "admin@example.com"}\n'
+        self.assertEqual(self.upload('departments.ndjson', content).json()['created'], 2)
+
+    def test_mixed_rows(self):
+        content = (b'{"department_name": "Alpha", "business_email": "a@example.com", "email": "a@example.com"}\n'
+                   b'{"department_name": "Beta", "business_email": "not-an-email", "email": "b@example.com"}\n'
+                   b'[1, 2]\n'
+                   b'{broken\n'
+                   b'{"department_name": "Gamma", "business_email": "c@example.com", "email": "c@example.com", '
+                   b'"owner": 999999}\n')
+        result = self.upload('departments.jsonl', content).json()
+        self.assertEqual((result['rows'], result['created'], result['failed']), (5, 1, 4))
+        self.assertEqual(sorted(error['line'] for error in result['errors']), [2, 3, 4, 5])
+        self.assertEqual(list(Department.objects.values_list('department_name', flat=True)), ['Alpha'])
+
+    def test_non_utf8_rejected(self):
+        response = self.upload('departments.csv', b'\xff\xfe\x00bad')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.json()['file'][0])
+        self.assertFalse(Department.objects.exists())
+
+    def test_command_reports_non_utf8(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as handle:
+            handle.write(b'\xff\xfe\x00bad')
+            handle.flush()
+            with self.assertRaisesMessage(CommandError, 'not valid UTF-8'):
+                call_command('import_departments', handle.name, '--owner', 'admin@example.com')
+        self.assertFalse(Department.objects.exists())
+
+    def test_decode_error_after_first_batch(self):
+        def lines():
+            yield self.HEADER
+            for i in range(3):
+                yield f'Dept {i},d{i}@example.com,d{i}@example.com,active\n'
+            raise UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid start byte')
+
+        result = import_departments(lines(), 'csv', default_owner=self.user, batch_size=2).to_dict()
+        self.assertEqual((result['created'], result['failed']), (3, 1))
+        self.assertIn('UTF-8', result['errors'][0]['errors']['non_field_errors'][0])
+
+
+# -----------------------------
+# Exports
+# -----------------------------
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        for i, status in enumerate(['active', 'active', 'pending', 'inactive']):
+            Department.objects.create(owner=cls.owner, department_name=f'Dept {i}', partnership_status=status,
+                                      business_email='biz@example.com', email='dept@example.com')
+        Department.objects.create(owner=cls.admin, department_name='Admin dept', partnership_status='active',
+                                  business_email='biz@example.com', email='dept@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.async_client = AsyncClient()
+        self.async_client.cookies = self.client.cookies
+
+    def export(self, fmt, **params):
+        response = self.client.get(f'/partnership/api/departments/export.{fmt}', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_respects_filters(self):
+        response, body = self.export('csv', status='active')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="departments.csv"')
+        lines = body.splitlines()
+        self.assertEqual(lines[0], ','.join(DEPARTMENT_EXPORT_FIELDS))
+        self.assertEqual(len(lines), 1 + 3)
+
+        _, body = self.export('csv', status='active', name='admin')
+        self.assertEqual(len(body.splitlines()), 1 + 1)
+
+    def test_ndjson_limited_to_own_departments(self):
+        self.client.force_login(self.owner)
+        response, body = self.export('ndjson', status='active')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['department_name'] for row in rows], ['Dept 0', 'Dept 1'])
+        self.assertEqual(set(rows[0]), set(DEPARTMENT_EXPORT_FIELDS))
+
+    def test_user_export(self):
+        response = self.client.get('/partnership/api/users/export.csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.csv"')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1 + 2)
+
+    @patch('partnership.exports.EXPORT_CHUNK_SIZE', 2)
+    async def test_async_stream_under_asgi(self):
+        for fmt in EXPORT_FORMATS:
+            with self.subTest(fmt=fmt):
+                url = f'/partnership/api/departments/export.{fmt}'
+                response = await self.async_client.get(url)
+                self.assertTrue(response.is_async)
+                body = b''.join([chunk async for chunk in response.streaming_content])
+                expected = await sync_to_async(lambda: b''.join(self.client.get(url).streaming_content))()
+                self.assertEqual(body, expected)
+
+
+# -----------------------------
+# Logo pipeline
+# -----------------------------
+def _image(color, fmt='PNG', name='logo.png', size=(4, 4)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def _png(color):
+    return _image(color)
+
+
+class LogoPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.department = Department.objects.create(owner=cls.owner, department_name='Alpha',
+                                                   business_email='biz@example.com', email='dept@example.com')
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_extension_from_detected_format(self):
+        store_logo(self.department, _image('red', name='evil.html'))
+        self.assertRegex(self.department.logo_path.name, r'^logos/[0-9a-f]{64}\.png$')
+        store_logo(self.department, _image('red', 'JPEG', name='photo.gif'))
+        self.assertTrue(self.department.logo_path.name.endswith('.jpg'))
+
+    def test_unlisted_format_rejected(self):
+        with self.assertRaises(ValidationError):
+            store_logo(self.department, _image('red', 'BMP', name='logo.png'))
+        with self.assertRaises(ValidationError):
+            store_logo(self.department, SimpleUploadedFile('logo.png', b'<html>not an image</html>'))
+
+    def test_variants_and_fallback_urls(self):
+        store_logo(self.department, _image('red', size=(1000, 500)))
+        self.department.save()
+        original = self.department.logo_path.url
+        self.assertEqual((self.department.logo_card_url, self.department.logo_detail_url), (original, original))
+
+        digest = generate_logo_variants(self.department)
+        self.assertEqual(Department.objects.get(pk=self.department.pk).logo_hash, digest)
+        self.assertEqual(len(default_storage.listdir('logos/variants')[1]), 3)
+        for variant, (width, _) in LOGO_VARIANTS.items():
+            with default_storage.open(logo_variant_name(digest, variant)) as handle, Image.open(handle) as image:
+                self.assertEqual(image.format, 'WEBP')
+                # 2:1 source, fitted into a square box
+                self.assertEqual(image.size, (width, width // 2))
+        self.assertEqual(self.department.logo_card_url, default_storage.url(logo_variant_name(digest, 'card')))
+        self.assertEqual(self.department.logo_detail_url, default_storage.url(logo_variant_name(digest, 'detail')))
+
+
+# -----------------------------
+# Conditional GETs
+# -----------------------------
+class ConditionalGetTests(TestCase):
+    URL = '/partnership/api/departments/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        for i in range(3):
+            department = Department.objects.create(owner=cls.owner, department_name=f'Dept {i}',
+                                                   business_email='biz@example.com', email='dept@example.com')
+            # Older rows, so Last-Modified is well in the past
+            Department.objects.filter(pk=department.pk).update(last_updated=hour_ago + datetime.timedelta(minutes=i))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_not_modified(self):
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        # Another query string is another representation
+        filtered = self.client.get(self.URL, {'status': 'active'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(filtered.status_code, 200)
+
+        url = f'{self.URL}{Department.objects.first().pk}/'
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=self.client.get(url)['ETag']).status_code, 304)
+
+    def test_edit_changes_etag(self):
+        etag = self.client.get(self.URL)['ETag']
+        department = Department.objects.order_by('last_updated').first()
+        department.remarks_status = 'Reviewed'
+        department.save()
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_delete_of_older_row(self):
+        response = self.client.get(self.URL)
+        Department.objects.order_by('last_updated').first().delete()
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        after = self.client.get(self.URL, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['Last-Modified'], response['Last-Modified'])
+
+    def test_owner_email_change(self):
+        etag = self.client.get(self.URL)['ETag']
+        self.owner.email = 'new-owner@example.com'
+        self.owner.save()
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['user_email'], 'new-owner@example.com')
+
+    def test_login_does_not_bump_departments(self):
+        before = list(Department.objects.values_list('last_updated', flat=True))
+        with self.assertNumQueries(1):
+            self.owner.save(update_fields=['last_login'])
+        self.assertEqual(list(Department.objects.values_list('last_updated', flat=True)), before)
+
+    def test_role_change_changes_dashboard_etag(self):
+        profile = UserProfile.objects.create(user=self.owner, business_email='owner@example.com',
+                                             department_name='Owner', contact_person='Owner',
+                                             contact_number='0000', user_type='department')
+        self.client.force_login(self.owner)
+        etag = self.client.get('/partnership/dashboard/')['ETag']
+        profile.user_type = 'owner'
+        profile.save()
+        self.assertEqual(self.client.get('/partnership/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+# -----------------------------
+# Query plan regression checks
+# -----------------------------
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite-specific')
+class HotQueryPlanTests(TestCase):
+    """
+    Run EXPLAIN QUERY PLAN on each hot query and fail if SQLite falls back
+    to a full table scan (a SCAN step that uses no index). FTS5 lookups
+    show up as a virtual table SCAN with a MATCH constraint (":M").
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        UserProfile.objects.create(user=cls.user, business_email='owner@example.com',
+                                   department_name='Owner', contact_person='Owner',
+                                   contact_number='0000', user_type='owner')
+        for status in ['active', 'pending', 'inactive']:
+            Department.objects.create(owner=cls.user, department_name=f'{status} dept',
+                                      business_email='biz@example.com', email='dept@example.com',
+                                      partnership_status=status)
+
+    def assertNoFullScan(self, run):
+        """Explain every query issued by `run` (a queryset or a callable)."""
+        with CaptureQueriesContext(connection) as captured:
+            if callable(run):
+                run()
+            else:
+                list(run)
+        self.assertTrue(captured.captured_queries, 'No query was executed')
+
+        for query in captured.captured_queries:
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plan = [row[-1] for row in cursor.fetchall()]
+            for step in plan:
+                if step.startswith('SCAN') and 'USING' not in step and ':M' not in step:
+                    self.fail('Full table scan:\n  {}\nSQL: {}'.format('\n  '.join(plan), query['sql']))
+
+    def test_user_lookup_by_email(self):
+        # login_view, signup_view, UserRegistrationForm.clean_email
+        self.assertNoFullScan(lambda: User.objects.get(email='owner@example.com'))
+        self.assertNoFullScan(lambda: User.objects.filter(email='owner@example.com').exists())
+
+    def test_admin_stats(self):
+        self.assertNoFullScan(compute_stats)
+
+    def test_status_filter_sorted_by_name(self):
+        self.assertNoFullScan(
+            Department.objects.filter(partnership_status='active').order_by('department_name', 'id')[:26]
+        )
+
+    def test_keyset_page_by_name(self):
+        self.assertNoFullScan(
+            Department.objects.filter(department_name__gt='m').order_by('department_name', 'id')[:26]
+        )
+
+    def test_api_cursor_page(self):
+        self.assertNoFullScan(Department.objects.order_by('-last_updated', '-id')[:26])
+
+    def test_list_etag_aggregate(self):
+        self.assertNoFullScan(lambda: list_validators(Department.objects.all()))
+
+    def test_established_date_filter(self):
+        self.assertNoFullScan(Department.objects.filter(established_date__gte=datetime.date(2024, 1, 1)))
+
+    def test_expiry_scan(self):
+        self.assertNoFullScan(expired_departments())
+
+    def test_incremental_expiry_scan(self):
+        since = timezone.now() - datetime.timedelta(days=1)
+        self.assertNoFullScan(expired_departments(since=since))
+
+    def test_owner_departments(self):
+        self.assertNoFullScan(Department.objects.filter(owner=self.user).order_by('id')[:1])
+
+    def test_email_login(self):
+        self.assertNoFullScan(with_landing_department(User.objects.filter(email='owner@example.com')))
+
+    def test_change_feed(self):
+        since = changes_since(None).cursor
+        self.assertNoFullScan(lambda: changes_since(since))
+
+    def test_users_by_type(self):
+        self.assertNoFullScan(UserProfile.objects.filter(user_type='owner'))
+
+    def test_full_text_search(self):
+        self.assertNoFullScan(search_departments(Department.objects.all(), 'active')[:26])
+
+
+# -----------------------------
+# Partnership expiry
+# -----------------------------
+class ExpirationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        today = timezone.localdate()
+        cls.past, cls.future = today - datetime.timedelta(days=3), today + datetime.timedelta(days=3)
+        for name, status, expires in [('due 1', 'active', cls.past), ('due 2', 'active', cls.past),
+                                      ('current', 'active', cls.future), ('no date', 'active', None),
+                                      ('pending', 'pending', cls.past), ('inactive', 'inactive', cls.past)]:
+            Department.objects.create(owner=cls.user, department_name=name, partnership_status=status,
+                                      expiration_date=expires, business_email='biz@example.com',
+                                      email='dept@example.com')
+
+    def statuses(self):
+        return dict(Department.objects.values_list('department_name', 'partnership_status'))
+
+    def test_only_past_due_active_rows(self):
+        result = expire_partnerships(batch_size=1)
+        self.assertEqual((result.expired, result.since), (2, None))
+        self.assertEqual(self.statuses(), {'due 1': 'inactive', 'due 2': 'inactive', 'current': 'active',
+                                           'no date': 'active', 'pending': 'pending', 'inactive': 'inactive'})
+
+    def test_checkpoint(self):
+        expire_partnerships()
+        second = expire_partnerships()
+        self.assertEqual(second.expired, 0)
+        self.assertIsNotNone(second.since)
+
+        # Rows edited after the checkpoint are picked up again
+        Department.objects.filter(department_name='current').update(
+            expiration_date=self.past, last_updated=timezone.now() + datetime.timedelta(seconds=1))
+        self.assertEqual(expire_partnerships().expired, 1)
+        self.assertEqual(self.statuses()['current'], 'inactive')
+
+    def test_command_dry_run(self):
+        out = io.StringIO()
+        call_command('expire_partnerships', '--dry-run', stdout=out)
+        self.assertIn('Would expire 2 partnerships', out.getvalue())
+        self.assertEqual(Department.objects.filter(partnership_status='active').count(), 4)
+
+
+# -----------------------------
+# Full-text search
+# -----------------------------
+@unittest.skipUnless(connection.vendor == 'sqlite', 'FTS5 index is SQLite-specific')
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.named = cls.create('Central Library', remarks='')
+        cls.remarked = cls.create('Registrar', remarks='Shares the library building')
+
+    @classmethod
+    def create(cls, name, remarks=''):
+        return Department.objects.create(owner=cls.user, department_name=name, remarks_status=remarks,
+                                         business_email='biz@example.com', email='dept@example.com')
+
+    def search(self, text):
+        return list(search_departments(Department.objects.all(), text).values_list('department_name', flat=True))
+
+    def test_ranking(self):
+        self.assertEqual(self.search('librar'), ['Central Library', 'Registrar'])
+        self.assertEqual(self.search('central librar'), ['Central Library'])
+        # FTS syntax is searched as plain words rather than raising
+        self.assertEqual(self.search('"library*'), ['Central Library', 'Registrar'])
+        self.assertEqual(self.search('library OR registrar'), [])
+        self.assertEqual(self.search('  '), [])
+
+    def test_index_follows_writes(self):
+        self.create('Nursing School')
+        Department.objects.bulk_create([Department(owner=self.user, department_name='Nursing Annex',
+                                                    business_email='biz@example.com', email='dept@example.com')])
+        self.assertEqual(sorted(self.search('nursing')), ['Nursing Annex', 'Nursing School'])
+
+        self.named.department_name = 'Main Archive'
+        self.named.save()
+        self.assertEqual(self.search('central'), [])
+        self.assertEqual(self.search('archive'), ['Main Archive'])
+
+        Department.objects.filter(pk=self.remarked.pk).update(remarks_status='')
+        self.assertEqual(self.search('library'), [])
+
+        Department.objects.filter(department_name__startswith='Nursing').delete()
+        self.assertEqual(self.search('nursing'), [])
+
+
+# -----------------------------
+# Email login
+# -----------------------------
+class EmailLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dept', 'dept@example.com', 'password')
+        cls.first = Department.objects.create(owner=cls.user, department_name='First',
+                                              business_email='biz@example.com', email='dept@example.com')
+        Department.objects.create(owner=cls.user, department_name='Second',
+                                  business_email='biz@example.com', email='dept@example.com')
+
+    def test_authenticate_is_one_query(self):
+        with self.assertNumQueries(1):
+            user = authenticate(email='dept@example.com', password='password')
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.landing_department_id, self.first.pk)
+
+    def test_wrong_password_or_email(self):
+        self.assertIsNone(authenticate(email='dept@example.com', password='wrong'))
+        self.assertIsNone(authenticate(email='nobody@example.com', password='password'))
+
+    def test_login_redirects_to_first_department(self):
+        response = self.client.post('/partnership/', {'email': 'dept@example.com', 'password': 'password'})
+        self.assertRedirects(response, f'/partnership/department/{self.first.pk}/', fetch_redirect_response=False)
+
+
+# -----------------------------
+# Role resolution
+# -----------------------------
+class RoleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        UserProfile.objects.create(user=cls.user, business_email='owner@example.com',
+                                   department_name='Owner', contact_person='Owner',
+                                   contact_number='0000', user_type='owner')
+
+    def request_for(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        request.session = SessionStore()
+        return request
+
+    def test_resolved_once_per_request(self):
+        request = self.request_for(User.objects.get(pk=self.user.pk))
+        with self.assertNumQueries(1):
+            role = resolve_role(request)
+            self.assertTrue(role.can_view_all)
+            self.assertFalse(role.is_admin)
+        with self.assertNumQueries(0):
+            self.assertIs(resolve_role(request), role)
+
+    def test_session_user_has_profile_joined(self):
+        user = EmailBackend().get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(resolve_role(self.request_for(user)).is_owner)
+
+    @override_settings(PARTNERSHIP_ROLE_IN_SESSION=True)
+    def test_session_cache(self):
+        request = self.request_for(User.objects.get(pk=self.user.pk))
+        resolve_role(request)
+        self.assertEqual(request.session['user_role'], 'owner')
+
+        later = self.request_for(User.objects.get(pk=self.user.pk))
+        later.session = request.session
+        with self.assertNumQueries(0):
+            self.assertTrue(resolve_role(later).is_owner)
+
+
+# -----------------------------
+# Department card fragment cache
+# -----------------------------
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        self.cache = caches[fragment_cache_alias()]
+        self.cache.clear()
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.department = Department.objects.create(owner=self.user, department_name='Alpha',
+                                                    business_email='biz@example.com', email='dept@example.com')
+        self.client.force_login(self.user)
+
+    def cached_cards(self, pk, last_updated):
+        return self.cache.get_many(department_card_keys(pk, last_updated))
+
+    def test_card_cached_and_invalidated_on_save(self):
+        self.assertContains(self.client.get('/partnership/dashboard/'), 'Alpha')
+        version = self.department.last_updated
+        self.assertEqual(len(self.cached_cards(self.department.pk, version)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.department_name = 'Beta'
+            self.department.save()
+        self.assertEqual(self.cached_cards(self.department.pk, version), {})
+
+        response = self.client.get('/partnership/dashboard/')
+        self.assertContains(response, 'Beta')
+        self.assertNotContains(response, 'Alpha')
+
+    def test_invalidated_on_delete(self):
+        self.client.get('/partnership/dashboard/')
+        pk, version = self.department.pk, self.department.last_updated
+        self.assertEqual(len(self.cached_cards(pk, version)), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.delete()
+        self.assertEqual(self.cached_cards(pk, version), {})
+
+
+# -----------------------------
+# Async views
+# -----------------------------
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.department = Department.objects.create(owner=cls.user, department_name='Alpha',
+                                                   business_email='biz@example.com', email='dept@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.async_client = AsyncClient()
+        self.async_client.cookies = self.client.cookies
+
+    async def test_read_views_under_asgi(self):
+        for url in ['/partnership/dashboard/', '/partnership/admin-panel/',
+                    f'/partnership/department/{self.department.pk}/']:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Alpha')
+
+    async def test_login_required(self):
+        response = await AsyncClient().get('/partnership/dashboard/')
+        self.assertEqual(response.status_code, 302)
+
+
+# -----------------------------
+# Live admin events
+# -----------------------------
+class LiveEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.department = Department.objects.create(owner=cls.user, department_name='Alpha',
+                                                   business_email='biz@example.com', email='dept@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.async_client = AsyncClient()
+        self.async_client.cookies = self.client.cookies
+
+    async def test_stream_events_then_stats(self):
+        hub = Broadcaster()
+        subscriber = hub.subscribe()
+        stream = event_stream(subscriber, stats=lambda: asyncio.sleep(0, {'total_departments': 1}))
+        self.assertEqual(await anext(stream), 'retry: 3000\n\n')
+
+        await asyncio.to_thread(hub.publish, 'department.updated', {'id': 7})
+        self.assertEqual(await anext(stream), 'id: 1\nevent: department.updated\ndata: {"id": 7}\n\n')
+        self.assertIn('event: stats', await anext(stream))
+
+    async def test_replay_after_last_event_id(self):
+        hub = Broadcaster()
+        for i in range(3):
+            hub.publish('department.deleted', {'id': i})
+        _, queue = hub.subscribe(last_event_id=1)
+        self.assertEqual([queue.get_nowait().id for _ in range(queue.qsize())], [2, 3])
+
+    def test_save_publishes_on_commit(self):
+        self.department.partnership_status = 'inactive'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.save()
+        event = broadcaster._recent[-1]
+        self.assertEqual(event.type, 'department.updated')
+        self.assertEqual(event.data['partnership_status'], 'inactive')
+
+    async def test_stream_view(self):
+        response = await self.async_client.get('/partnership/admin-panel/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(await anext(aiter(response.streaming_content)), b'retry: 3000\n\n')
+
+    @override_settings(PARTNERSHIP_EVENTS_STREAM_SECONDS=0.05)
+    async def test_stream_ends_and_unsubscribes(self):
+        before = broadcaster.subscriber_count
+        response = await self.async_client.get('/partnership/admin-panel/events/')
+        self.assertEqual(broadcaster.subscriber_count, before + 1)
+        messages = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(messages, [b'retry: 3000\n\n'])
+        self.assertEqual(broadcaster.subscriber_count, before)
+
+    async def test_stream_lifetime_bounds_keepalives(self):
+        stream = event_stream(Broadcaster().subscribe(), stats=None, keepalive=0.02, max_seconds=0.07)
+        messages = [message async for message in stream]
+        self.assertEqual(messages[0], 'retry: 3000\n\n')
+        # The generator ran out on its own; only keepalives in between
+        self.assertEqual(set(messages[1:]), {': keepalive\n\n'})
+
+    def test_stream_view_admin_only(self):
+        owner = User.objects.create_user('dept', 'dept@example.com', 'password')
+        UserProfile.objects.create(user=owner, business_email=owner.email, department_name='Dept',
+                                   contact_person='Dept', contact_number='1', user_type='department')
+        self.client.force_login(owner)
+        self.assertEqual(self.client.get('/partnership/admin-panel/events/').status_code, 403)
+
+
+# -----------------------------
+# Batch updates
+# -----------------------------
+class BatchUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.departments = [
+            Department.objects.create(owner=cls.user, department_name=f'Dept {i}', partnership_status='pending',
+                                      business_email='biz@example.com', email='dept@example.com')
+            for i in range(3)
+        ]
+
+    def test_per_row_results(self):
+        a, b, c = (department.pk for department in self.departments)
+        rows = [
+            {'id': a, 'partnership_status': 'active', 'remarks_status': 'Signed'},
+            {'id': b, 'partnership_status': 'pending'},
+            {'id': c, 'partnership_status': 'bogus'},
+            {'id': 999999, 'remarks_status': 'x'},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            result = batch_update_departments(rows).to_dict()
+        self.assertEqual([row['result'] for row in result['results']], ['updated', 'unchanged', 'invalid', 'not_found'])
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(Department.objects.get(pk=a).remarks_status, 'Signed')
+
+    def test_all_or_nothing(self):
+        rows = [{'id': self.departments[0].pk, 'partnership_status': 'active'}, {'id': 999999, 'remarks_status': 'x'}]
+        result = batch_update_departments(rows, all_or_nothing=True).to_dict()
+        self.assertFalse(result['applied'])
+        self.assertEqual(result['results'][0]['result'], 'skipped')
+        self.assertEqual(Department.objects.get(pk=self.departments[0].pk).partnership_status, 'pending')
+
+    def test_api_and_admin_panel(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/partnership/api/departments/batch/', {
+            'updates': [{'id': department.pk, 'partnership_status': 'inactive'} for department in self.departments],
+        }, content_type='application/json')
+        self.assertEqual(response.json()['updated'], 3)
+
+        response = self.client.post('/partnership/admin-panel/', {
+            'action': 'batch_update', 'department_ids': [self.departments[0].pk, self.departments[1].pk],
+            'set_remarks': '1', 'remarks_status': 'Reviewed',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Department.objects.filter(remarks_status='Reviewed').count(), 2)
+
+    def test_admin_panel_messages(self):
+        self.client.force_login(self.user)
+        data = {'action': 'batch_update', 'partnership_status': 'pending'}
+
+        response = self.client.post('/partnership/admin-panel/', {**data, 'department_ids': [999999]})
+        self.assertEqual([str(message) for message in get_messages(response.wsgi_request)],
+                         ['1 of 1 departments could not be updated.'])
+
+        with patch('partnership.batch.MAX_BATCH_SIZE', 1):
+            response = self.client.post('/partnership/admin-panel/', {
+                **data, 'department_ids': [department.pk for department in self.departments],
+            })
+        shown = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertEqual(shown[-1], 'At most 1 rows per batch.')
+        self.assertFalse(any(message.endswith('departments updated.') for message in shown))
+
+
+# -----------------------------
+# Static files
+# -----------------------------
+class StaticFilesTests(TestCase):
+    CSS = b'.card { color: #333; padding: 1rem; }\n' * 50
+
+    def setUp(self):
+        source, root = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(root.cleanup)
+        with open(f'{source.name}/site.css', 'wb') as handle:
+            handle.write(self.CSS)
+        settings_override = override_settings(STATICFILES_DIRS=[source.name], STATIC_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_hashed_gzip_copy_served_immutable(self):
+        url = static('site.css')
+        self.assertRegex(url, r'/static/site\.[0-9a-f]{12}\.css$')
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(gzip.decompress(response.content), self.CSS)
+
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(plain.content, self.CSS)
+
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_unhashed_name_short_lived(self):
+        response = self.client.get('/static/site.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(self.client.get('/static/missing.css').status_code, 404)
+
+
+# -----------------------------
+# Media serving
+# -----------------------------
+class MediaServingTests(TestCase):
+    LOGO = bytes(range(256)) * 4
+    NAME = f'logos/{"ab" * 32}.png'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+        Department.objects.create(owner=cls.owner, department_name='Alpha', logo_path=cls.NAME,
+                                  business_email='biz@example.com', email='dept@example.com')
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        os.makedirs(f'{root.name}/logos')
+        with open(f'{root.name}/{self.NAME}', 'wb') as handle:
+            handle.write(self.LOGO)
+        settings_override = override_settings(MEDIA_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = f'/media/{self.NAME}'
+        self.client.force_login(self.owner)
+
+    def test_full_conditional_and_range(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.content, self.LOGO)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 10-19/{len(self.LOGO)}')
+        self.assertEqual(partial.content, self.LOGO[10:20])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=-4').content, self.LOGO[-4:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=5000-').status_code, 416)
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_permissions(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get('/media/logos/../logos/x.png').status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    @override_settings(PARTNERSHIP_MEDIA_SENDFILE='x-accel-redirect')
+    def test_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.NAME}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_non_image_served_as_attachment(self):
+        name = f'logos/{"cd" * 32}.html'
+        with open(os.path.join(settings.MEDIA_ROOT, name), 'wb') as handle:
+            handle.write(b'<script>alert(1)</script>')
+        Department.objects.create(owner=self.owner, department_name='Beta', logo_path=name,
+                                  business_email='beta@example.com', email='beta-dept@example.com')
+
+        response = self.client.get(f'/media/{name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+        image = self.client.get(self.url)
+        self.assertEqual(image['Content-Type'], 'image/png')
+        self.assertNotIn('Content-Disposition', image)
+
+
+# -----------------------------
+# Deletion and logo cleanup
+# -----------------------------
+@override_settings(PARTNERSHIP_JOBS_EAGER=True, PARTNERSHIP_BACKGROUND_DELETE_THRESHOLD=2)
+class DeletionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        settings_override = override_settings(MEDIA_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def department(self, name='Dept', owner=None):
+        return Department.objects.create(owner=owner or self.owner, department_name=name,
+                                          business_email='biz@example.com', email='dept@example.com')
+
+    def test_large_cascade_deferred(self):
+        for i in range(3):
+            self.department(f'Dept {i}')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(delete_user(self.owner))
+            self.assertFalse(User.objects.get(pk=self.owner.pk).is_active)
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+        self.assertEqual(DepartmentTombstone.objects.count(), 3)
+
+    @override_settings(PARTNERSHIP_JOBS_EAGER=False)
+    def test_small_cascade_inline(self):
+        names = set()
+        for i, color in enumerate(['red', 'green']):
+            department = self.department(f'Dept {i}')
+            store_logo(department, _png(color))
+            department.save()
+            names.add(department.logo_path.name)
+
+        self.assertFalse(delete_user(self.owner))
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+        jobs = Job.objects.filter(task='partnership.deletion.delete_unreferenced_logos')
+        self.assertEqual(jobs.count(), 1)
+        self.assertEqual(set(jobs.get().args[0]), names)
+
+    def test_replaced_and_deleted_logos_removed_unless_shared(self):
+        first, second = self.department('First'), self.department('Second')
+        for department in (first, second):
+            store_logo(department, _png('red'))
+            department.save()
+        shared = first.logo_path.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            store_logo(first, _png('blue'))
+            first.save()
+        self.assertTrue(os.path.exists(os.path.join(self.root, shared)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(os.path.join(self.root, shared)))
+
+    def test_gc_removes_old_orphans_only(self):
+        kept = self.department()
+        store_logo(kept, _png('red'))
+        kept.logo_hash = 'ab' * 32
+        kept.save()
+        names = [f'logos/{"cd" * 32}.png', logo_variant_name('ab' * 32, 'card'), logo_variant_name('cd' * 32, 'card')]
+        os.makedirs(os.path.join(self.root, 'logos/variants'))
+        for name in names:
+            with open(os.path.join(self.root, name), 'wb') as handle:
+                handle.write(b'x' * 10)
+
+        result = collect_orphaned_logos(grace_seconds=60, now=time.time() + 120, batch_size=2)
+        self.assertEqual((result.scanned, result.deleted, result.freed_bytes), (4, 2, 20))
+        remaining = {name for name in names + [kept.logo_path.name] if os.path.exists(os.path.join(self.root, name))}
+        self.assertEqual(remaining, {kept.logo_path.name, names[1]})
+        self.assertEqual(collect_orphaned_logos(grace_seconds=60).deleted, 0)
+
+    @override_settings(PARTNERSHIP_JOBS_EAGER=False)
+    def test_purge_queues_one_logo_job(self):
+        names = set()
+        for i in range(3):
+            department = self.department(f'Dept {i}')
+            store_logo(department, _png(('red', 'green', 'blue')[i]))
+            department.save()
+            names.add(department.logo_path.name)
+
+        purge_user(self.owner.pk, batch_size=2)
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+        jobs = Job.objects.filter(task='partnership.deletion.delete_unreferenced_logos')
+        self.assertEqual(jobs.count(), 1)
+        self.assertEqual(set(jobs.get().args[0]), names)
+
+        # Outside a purge every release still queues its own job
+        other = self.department('Other', owner=User.objects.create_user('other', 'other@example.com', 'password'))
+        store_logo(other, _png('red'))
+        other.save()
+        other.delete()
+        self.assertEqual(jobs.count(), 2)
+
+
+# -----------------------------
+# Job queue
+# -----------------------------
+job_calls = []
+
+
+@task(max_attempts=2, backoff=30)
+def record_job(value, fail=False):
+    if fail:
+        raise RuntimeError('boom')
+    job_calls.append(value)
+
+
+@task()
+def long_job():
+    job_calls.append(heartbeat())
+    # Another worker's maintenance pass, while this job is still running
+    job_calls.append(requeue_stale_jobs(60))
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        job_calls.clear()
+
+    def test_claim_limit_and_run(self):
+        for value in range(3):
+            record_job.delay(value)
+        first = claim_jobs(2, worker='w1')
+        self.assertEqual([job.args for job in first], [[0], [1]])
+        self.assertEqual({job.attempts for job in first}, {1})
+        self.assertEqual(len(claim_jobs(5, worker='w2')), 1)
+        self.assertEqual(claim_jobs(5, worker='w3'), [])
+
+        self.assertEqual(run_job(first[0]), 'succeeded')
+        self.assertEqual(job_calls, [0])
+
+    def test_retry_with_backoff_then_fail(self):
+        record_job.delay(1, fail=True)
+        job = claim_jobs(1)[0]
+        with self.assertLogs('partnership.jobs', 'WARNING'):
+            self.assertEqual(run_job(job), 'queued')
+        job.refresh_from_db()
+        self.assertGreater(job.run_after, timezone.now() + datetime.timedelta(seconds=20))
+        self.assertIn('boom', job.last_error)
+        self.assertEqual(claim_jobs(1), [])
+
+        job = claim_jobs(1, now=job.run_after)[0]
+        with self.assertLogs('partnership.jobs', 'WARNING'):
+            self.assertEqual(run_job(job), 'failed')
+
+    def test_unknown_task_and_stale_lock(self):
+        Job.objects.create(task='partnership.nowhere')
+        job = claim_jobs(1)[0]
+        self.assertEqual(requeue_stale_jobs(60, now=timezone.now() + datetime.timedelta(seconds=120)), 1)
+        job = claim_jobs(1)[0]
+        with self.assertLogs('partnership.jobs', 'WARNING'):
+            self.assertEqual(run_job(job), 'failed')
+
+    def test_heartbeat_keeps_long_job(self):
+        long_job.delay()
+        job = claim_jobs(1)[0]
+        # Claimed long ago: without the heartbeat it would count as stale
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - datetime.timedelta(seconds=120))
+        self.assertEqual(run_job(job), 'succeeded')
+        self.assertEqual(job_calls, [True, 0])
+        self.assertTrue(heartbeat())
+
+    @override_settings(PARTNERSHIP_BACKGROUND_DELETE_THRESHOLD=0)
+    def test_user_delete_view_queues_purge(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        Department.objects.create(owner=owner, department_name='Alpha',
+                                  business_email='biz@example.com', email='dept@example.com')
+        self.client.force_login(admin)
+        self.client.post(f'/partnership/admin-panel/user/{owner.pk}/delete/')
+        self.assertTrue(User.objects.filter(pk=owner.pk, is_active=False).exists())
+
+        job = claim_jobs(1)[0]
+        self.assertEqual(job.task, 'partnership.deletion.purge_user')
+        self.assertEqual(run_job(job), 'succeeded')
+        self.assertFalse(User.objects.filter(pk=owner.pk).exists())
+
+
+class JobWorkerTests(TransactionTestCase):
+    def test_thread_worker_burst(self):
+        job_calls.clear()
+        for value in range(5):
+            record_job.delay(value)
+        self.assertEqual(Worker(concurrency=2, poll_interval=0.01).run(burst=True), 5)
+        self.assertEqual(sorted(job_calls), list(range(5)))
+        self.assertEqual(Job.objects.filter(status='succeeded').count(), 5)
+
+
+# -----------------------------
+# Database profile
+# -----------------------------
+class DatabaseProfileTests(TestCase):
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite pragmas')
+    @override_settings(PARTNERSHIP_SQLITE_PRAGMAS={'cache_size': -4000, 'busy_timeout': 1234})
+    def test_pragmas_applied_on_connect(self):
+        apply_sqlite_pragmas(sender=connection.__class__, connection=connection)
+        self.assertEqual(sqlite_pragma_values(names=['cache_size', 'busy_timeout']),
+                         {'cache_size': -4000, 'busy_timeout': 1234})
+
+
+# -----------------------------
+# Change feed
+# -----------------------------
+@override_settings(PARTNERSHIP_CHANGES_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        for i in range(3):
+            Department.objects.create(owner=cls.owner, department_name=f'Dept {i}',
+                                      business_email='biz@example.com', email='dept@example.com')
+
+    def test_only_changes_since_cursor(self):
+        full = changes_since(None)
+        self.assertEqual(len(full.changed), 3)
+        self.assertEqual(changes_since(full.cursor).changed, [])
+
+        edited = Department.objects.order_by('id').first()
+        edited.remarks_status = 'Renewed'
+        edited.save()
+        deleted = Department.objects.order_by('id').last()
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        delta = changes_since(full.cursor)
+        self.assertEqual(delta.changed, [edited])
+        self.assertEqual(delta.deleted, [deleted_pk])
+
+    def test_owner_cascade_leaves_tombstones(self):
+        self.owner.delete()
+        self.assertEqual(DepartmentTombstone.objects.count(), 3)
+
+    def test_paging(self):
+        first = changes_since(None, limit=2)
+        self.assertTrue(first.has_more)
+        rest = changes_since(first.cursor, limit=2)
+        self.assertEqual(len(rest.changed), 1)
+        self.assertFalse(rest.has_more)
+
+
+# -----------------------------
+# Query budgets
+# -----------------------------
+@override_settings(PARTNERSHIP_QUERY_BUDGET_ACTION='raise')
+class QueryBudgetTests(TestCase):
+    """Hit the hot views with a page's worth of rows; the middleware raises on overspend."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        UserProfile.objects.create(user=cls.user, business_email='admin@example.com',
+                                   department_name='Admin', contact_person='Admin',
+                                   contact_number='0000', user_type='admin')
+        Department.objects.bulk_create([
+            Department(owner=cls.user, department_name=f'Dept {i}', business_email='biz@example.com',
+                       email='dept@example.com', partnership_status='active')
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_views_within_budget(self):
+        department = Department.objects.first()
+        urls = [
+            '/partnership/dashboard/',
+            '/partnership/owner-panel/',
+            '/partnership/admin-panel/',
+            f'/partnership/department/{department.pk}/',
+            '/partnership/api/departments/',
+            f'/partnership/api/departments/{department.pk}/',
+            '/partnership/api/users/',
+            '/partnership/api/stats/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(PARTNERSHIP_QUERY_BUDGETS={'dashboard': 1})
+    def test_overspend_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/partnership/dashboard/')
+
+
+# -----------------------------
+# Seeding / benchmark smoke test
+# -----------------------------
+class BenchmarkTests(TestCase):
+    def test_seed_and_benchmark(self):
+        seed(200, users=20, batch_size=64)
+        self.assertEqual(Department.objects.count(), 200)
+        self.assertEqual(UserProfile.objects.filter(user__username__startswith='seed-user-').count(), 20)
+
+        report = run_benchmark(iterations=2, warmup=0, host='testserver')
+        for name, summary in report['results'].items():
+            with self.subTest(scenario=name):
+                self.assertTrue(all(code < 400 for code in summary['statuses']), summary['statuses'])
+                self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
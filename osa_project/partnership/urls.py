@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 
@@ -22,12 +22,17 @@ urlpatterns = [
     path('department/<int:dept_id>/edit/', views.department_edit_view, name='department_edit'),
     
     path('admin-panel/', views.admin_panel_view, name='admin_panel'),
+    path('admin-panel/events/', views.admin_events_view, name='admin_events'),
     path('admin-panel/user/<int:user_id>/delete/', views.user_delete_view, name='user_delete'),
     path('owner-panel/', views.owner_panel_view, name='owner_panel'),
     
     path('owner-panel/department/add/', views.department_add_view, name='department_add'),
     path('owner-panel/department/<int:dept_id>/delete/', views.department_delete_view, name='department_delete'),
     
+    path('api/stats/', views.stats_api_view, name='stats'),
+    re_path(r'^api/departments/export\.(?P<fmt>csv|ndjson)$', views.department_export_view, name='department_export'),
+    re_path(r'^api/users/export\.(?P<fmt>csv|ndjson)$', views.user_export_view, name='user_export'),
+
     # Include DRF API routes at /api/
     path('api/', include(router.urls)),
 ]
@@ -1,11 +1,40 @@
+import io
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.contrib.auth.models import User
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from rest_framework import viewsets
+from rest_framework import permissions, serializers, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+from .backends import landing_department_id
+from .batch import batch_update_departments
+from .changes import changes_since, get_changes_page_size
+from .conditional import (
+    alist_validators, department_validators, list_validators, not_modified_response, role_key, set_validators,
+)
+from .deletion import delete_user
+from .events import DEFAULT_STREAM_SECONDS, broadcaster, event_stream
+from .exports import DEPARTMENT_EXPORT_FIELDS, USER_EXPORT_FIELDS, export_response
+from .filters import department_filter_context, department_sort, filter_departments, filter_users
+from .images import build_logo_variants, store_logo
+from .importers import IMPORT_FORMATS, ImportDecodeError, guess_format, import_departments
 from .models import UserProfile, Department
-from .serializers import UserSerializer, DepartmentSerializer
+from .pagination import (
+    DepartmentCursorPagination, SearchPagination, UserCursorPagination, akeyset_paginate, aoffset_paginate,
+    keyset_paginate,
+)
+from .permissions import IsAdminOrOwnerRole, IsAdminUser
+from .roles import alogin_required, aresolve_role, resolve_role
+from .search import search_departments
+from .serializers import UserSerializer, UserCreateSerializer, DepartmentSerializer
+from .stats import aget_stats, get_stats
 from partnership.models import Department
 from django.shortcuts import redirect, render
 from django.contrib.auth import authenticate, login
@@ -14,6 +43,15 @@ from django.core.exceptions import ValidationError
 
 
 
+# Sync-only steps of the async views (session reads, template context
+# processors) run on the sync thread
+def _has_messages(request):
+    return bool(messages.get_messages(request))
+
+
+ahas_messages = sync_to_async(_has_messages)
+arender = sync_to_async(render)
+
 
 def ensure_default_department():
     if not Department.objects.exists():
@@ -33,10 +71,10 @@ def department_edit_view(request, dept_id):
     - Owners can edit only their own department.
     - Admins and superusers can edit any department.
     """
-    user_profile = getattr(request.user, 'profile', None)
+    role = resolve_role(request)
 
     # Determine access
-    if request.user.is_superuser or (user_profile and user_profile.user_type in ['admin']):
+    if role.is_admin:
         # Admin/superuser can edit any department
         department = get_object_or_404(Department, id=dept_id)
     else:
@@ -61,15 +99,23 @@ def department_edit_view(request, dept_id):
         if expiration_date:
             department.expiration_date = expiration_date
 
-        # Update logo if uploaded
-        if 'logo_path' in request.FILES:
-            department.logo_path = request.FILES['logo_path']
+        # Update logo if uploaded (stored under its content hash)
+        logo_uploaded = 'logo_path' in request.FILES
+        if logo_uploaded:
+            try:
+                store_logo(department, request.FILES['logo_path'])
+            except ValidationError as exc:
+                messages.error(request, exc.messages[0])
+                return render(request, 'partnership/department_edit.html', {'department': department})
 
         department.save()
+        if logo_uploaded:
+            # Thumbnails are rendered by the job worker; pages show the original until then
+            build_logo_variants.delay(department.pk)
         messages.success(request, 'Department updated successfully!')
 
         # Redirect admins to admin panel, owners to department detail
-        if request.user.is_superuser or (user_profile and user_profile.user_type in ['admin']):
+        if role.is_admin:
             return redirect('admin_panel')
         else:
             return redirect('department_detail', dept_id=department.id)
@@ -134,7 +180,7 @@ def signup_view(request):
         )
 
         # Auto-login user
-        user = authenticate(request, username=username, password=password)
+        user = authenticate(request, email=email, password=password)
         if user:
             login(request, user)
             return redirect('department_detail', dept_id=department.id)
@@ -145,40 +191,30 @@ def signup_view(request):
 # -----------------------------
 # Login View
 # -----------------------------
+def landing_redirect(user):
+    # Superuser → admin panel; normal users → first department or dashboard
+    if user.is_superuser:
+        return redirect('admin_panel')
+    department_id = landing_department_id(user)
+    if department_id:
+        return redirect('department_detail', dept_id=department_id)
+    return redirect('dashboard')
+
+
 def login_view(request):
     # If user already logged in
     if request.user.is_authenticated:
-        if request.user.is_superuser:
-            return redirect('admin_panel')  # Superuser → admin panel
-        else:
-            # Normal users → first department or dashboard
-            department = Department.objects.filter(owner=request.user).first()
-            if department:
-                return redirect('department_detail', dept_id=department.id)
-            return redirect('dashboard')
+        return landing_redirect(request.user)
 
     if request.method == 'POST':
         email = request.POST.get('email')
         password = request.POST.get('password')
-        try:
-            user_obj = User.objects.get(email=email)
-            user = authenticate(request, username=user_obj.username, password=password)
-            if user:
-                login(request, user)
-                
-                # Superuser → admin panel
-                if user.is_superuser:
-                    return redirect('admin_panel')
-                
-                # Normal users → first department or dashboard
-                department = Department.objects.filter(owner=user).first()
-                if department:
-                    return redirect('department_detail', dept_id=department.id)
-                return redirect('dashboard')
-            else:
-                messages.error(request, 'Invalid credentials')
-        except User.DoesNotExist:
-            messages.error(request, 'User not found')
+        # EmailBackend: one query fetches the user and their landing department
+        user = authenticate(request, email=email, password=password)
+        if user:
+            login(request, user)
+            return landing_redirect(user)
+        messages.error(request, 'Invalid email or password')
 
     return render(request, 'partnership/login.html')
 
@@ -195,98 +231,193 @@ def logout_view(request):
 # -----------------------------
 # Department Detail View
 # -----------------------------
-@login_required
-def department_detail_view(request, dept_id):
-    department = get_object_or_404(Department, id=dept_id)
+@alogin_required
+async def department_detail_view(request, dept_id):
+    try:
+        department = await Department.objects.aget(id=dept_id)
+    except Department.DoesNotExist:
+        raise Http404('No Department matches the given query.')
 
     # Restrict access: only superuser, admin, owner, or department owner
-    user_profile = getattr(request.user, 'profile', None)
-    if not (request.user.is_superuser or
-            (user_profile and user_profile.user_type in ['admin', 'owner']) or
-            department.owner == request.user):
+    role = await aresolve_role(request)
+    if not (role.can_view_all or role.owns(department)):
         messages.error(request, "You do not have permission to view this department.")
         return redirect('dashboard')
 
-    return render(request, 'partnership/department_detail.html', {'department': department})
+    # The page shows an edit link depending on the viewer and their role, so both are part of the ETag
+    etag, last_modified = department_validators(department, request.user.pk, role_key(role))
+    if not await ahas_messages(request):
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+
+    response = await arender(request, 'partnership/department_detail.html', {'department': department})
+    return set_validators(response, etag, last_modified)
 
 
 # -----------------------------
 # Placeholder Views for URLs
 # -----------------------------
-@login_required
-def dashboard_view(request):
+@alogin_required
+async def dashboard_view(request):
     # If the user is an owner/admin, show all departments, otherwise only their own
-    user_profile = getattr(request.user, 'profile', None)
-    
-    if request.user.is_superuser or (user_profile and user_profile.user_type in ['owner', 'admin']):
+    role = await aresolve_role(request)
+    if role.can_view_all:
         departments = Department.objects.all()
     else:
         departments = Department.objects.filter(owner=request.user)
+
+    departments = filter_departments(departments, request.GET)
+
+    # Answer repeat polls with a 304 before paginating or rendering anything;
+    # pending flash messages always get a full render so they aren't lost
+    etag, last_modified = await alist_validators(departments, request.user.pk, role_key(role), request.GET.urlencode())
+    if not await ahas_messages(request):
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+
+    sort = department_sort(request.GET)
+    query = request.GET.get('q', '').strip()
+    if query:
+        # Ranked full-text results are paged by number rather than seeked
+        page = await aoffset_paginate(search_departments(departments, query), request.GET)
+    else:
+        page = await akeyset_paginate(departments, request.GET, sort=sort)
     
-    return render(request, 'partnership/dashboard.html', {
-        'departments': departments
+    response = await arender(request, 'partnership/dashboard.html', {
+        'departments': page.object_list,
+        'page': page,
+        'filters': department_filter_context(request.GET, sort),
     })
+    return set_validators(response, etag, last_modified)
 
 
 @login_required
 def owner_panel_view(request):
-    # Ensure we get the UserProfile for the logged-in user
-    try:
-        profile = request.user.profile
-    except UserProfile.DoesNotExist:
-        profile = None
+    # The logged-in user's UserProfile (None if they have none)
+    profile = resolve_role(request).profile
 
     # Only show departments owned by the current user
     departments = Department.objects.filter(owner=request.user)
+    sort = department_sort(request.GET)
+    page = keyset_paginate(filter_departments(departments, request.GET), request.GET, sort=sort)
 
     context = {
         'user': profile,  # For user info in the template
         'user_email': request.user.email,
-        'departments': departments
+        'departments': page.object_list,
+        'page': page,
+        'filters': department_filter_context(request.GET, sort),
     }
 
     return render(request, 'partnership/owner_panel.html', context)
 
-# Only allow admin users
-def is_admin(user):
-    return user.is_authenticated and user.profile.user_type == 'admin'
+def _update_remarks(request):
+    dept_id = request.POST.get('department_id')
+    remarks_status = request.POST.get('remarks_status')
+    if dept_id and remarks_status is not None:
+        department = get_object_or_404(Department, id=dept_id)
+        department.remarks_status = remarks_status
+        department.save()
+        messages.success(request, f"Remarks for '{department.department_name}' updated successfully!")
 
-@login_required
-def admin_panel_view(request):
-    user_profile = getattr(request.user, 'profile', None)
-    if not request.user.is_superuser and not (user_profile and user_profile.user_type in ['owner', 'admin']):
+
+def _batch_update(request):
+    """Admin panel multi-select: apply the chosen status and/or remarks to every ticked department."""
+    changes = {}
+    if request.POST.get('partnership_status'):
+        changes['partnership_status'] = request.POST['partnership_status']
+    if request.POST.get('set_remarks'):
+        changes['remarks_status'] = request.POST.get('remarks_status', '')
+    ids = request.POST.getlist('department_ids')
+    if not ids or not changes:
+        messages.error(request, 'Select departments and a change to apply.')
+        return
+
+    try:
+        result = batch_update_departments([{'id': pk, **changes} for pk in ids])
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return
+    if result.failed:
+        messages.error(request, f'{result.failed} of {len(ids)} departments could not be updated.')
+    if result.count('updated'):
+        messages.success(request, f"{result.count('updated')} departments updated.")
+
+
+@alogin_required
+async def admin_panel_view(request):
+    if not (await aresolve_role(request)).can_view_all:
         messages.error(request, "You don't have permission to access Admin Panel.")
         return redirect('dashboard')
 
     # Handle POST requests for updating remarks
     if request.method == 'POST':
-        dept_id = request.POST.get('department_id')
-        remarks_status = request.POST.get('remarks_status')
-        if dept_id and remarks_status is not None:
-            department = get_object_or_404(Department, id=dept_id)
-            department.remarks_status = remarks_status
-            department.save()
-            messages.success(request, f"Remarks for '{department.department_name}' updated successfully!")
+        if request.POST.get('action') == 'batch_update':
+            await sync_to_async(_batch_update)(request)
+        else:
+            await sync_to_async(_update_remarks)(request)
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            # Saved in place from the live panel; the change comes back as an event
+            return HttpResponse(status=204)
         return redirect('admin_panel')  # redirect to avoid resubmission
 
-    # Compute stats
-    stats = {
-        'total_departments': Department.objects.count(),
-        'active_partnerships': Department.objects.filter(partnership_status='active').count(),
-        'pending_partnerships': Department.objects.filter(partnership_status='pending').count(),
-        'total_users': User.objects.count(),
-    }
-
-    departments = Department.objects.all()
-    users = User.objects.all()
-    return render(request, 'partnership/admin_panel.html', {
+    # Cached stats and one page of each table; profile/owner are joined so
+    # rows cost no extra queries. The ORM calls run one after another on
+    # Django's shared sync thread, so they are awaited in turn
+    sort = department_sort(request.GET)
+    departments = filter_departments(Department.objects.select_related('owner'), request.GET)
+    stats = await aget_stats()
+    departments_page = await akeyset_paginate(departments, request.GET, sort=sort)
+    users = User.objects.select_related('profile')
+    users_page = await akeyset_paginate(users, request.GET, cursor_param='users_cursor')
+
+    return await arender(request, 'partnership/admin_panel.html', {
         'stats': stats,
-        'departments': departments,
-        'users': users,
+        'departments': departments_page.object_list,
+        'departments_page': departments_page,
+        'users': users_page.object_list,
+        'users_page': users_page,
+        'filters': department_filter_context(request.GET, sort),
         'user_email': request.user.email,  # optional, if you show email in template
     })
 
 
+@alogin_required
+async def admin_events_view(request):
+    """
+    Server-Sent Events stream for the admin panel: department
+    created/updated/deleted events, user events and fresh stats counters.
+    Needs the ASGI server (the stream is a long-lived async generator). Each
+    stream lasts PARTNERSHIP_EVENTS_STREAM_SECONDS; the browser then reconnects
+    with Last-Event-ID, which also frees the subscriber of a closed tab.
+    """
+    if not (await aresolve_role(request)).can_view_all:
+        return HttpResponseForbidden()
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('Live updates are only available under ASGI.', status=501)
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    max_seconds = getattr(settings, 'PARTNERSHIP_EVENTS_STREAM_SECONDS', DEFAULT_STREAM_SECONDS)
+    subscriber = broadcaster.subscribe(last_event_id)
+
+    async def stream():
+        try:
+            async for message in event_stream(subscriber, aget_stats, max_seconds=max_seconds):
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+
 @login_required
 def department_delete_view(request, dept_id):
     """
@@ -295,11 +426,11 @@ def department_delete_view(request, dept_id):
     - Owners can only delete their own department
     """
     department = get_object_or_404(Department, id=dept_id)
-    user_profile = getattr(request.user, 'profile', None)
+    role = resolve_role(request)
 
     # Check permissions
-    is_admin = request.user.is_superuser or (user_profile and user_profile.user_type == 'admin')
-    is_owner = department.owner == request.user
+    is_admin = role.is_admin
+    is_owner = role.owns(department)
 
     if not (is_admin or is_owner):
         messages.error(request, "You don't have permission to delete this department.")
@@ -332,7 +463,6 @@ def user_delete_view(request, user_id):
     - Cannot delete yourself
     """
     user_to_delete = get_object_or_404(User, id=user_id)
-    user_profile = getattr(request.user, 'profile', None)
 
     # Check permissions - only superuser can delete users
     if not request.user.is_superuser:
@@ -346,23 +476,215 @@ def user_delete_view(request, user_id):
 
     if request.method == 'POST':
         username = user_to_delete.username
-        user_to_delete.delete()
-        messages.success(request, f"User '{username}' deleted successfully!")
+        if delete_user(user_to_delete):
+            messages.success(request, f"User '{username}' has been deactivated; their departments are being deleted in the background.")
+        else:
+            messages.success(request, f"User '{username}' deleted successfully!")
         return redirect('admin_panel')
 
     return render(request, 'partnership/user_delete_confirm.html', {'user_to_delete': user_to_delete})
 
 
+# -----------------------------
+# Streaming exports
+# -----------------------------
+@login_required
+def department_export_view(request, fmt):
+    """
+    Export departments as CSV/NDJSON using the API list filters:
+    - Superusers, admins and owners export every department
+    - Other users export only their own
+    Under ASGI the body is an async generator, so it streams there too.
+    """
+    if resolve_role(request).can_view_all:
+        departments = Department.objects.all()
+    else:
+        departments = Department.objects.filter(owner=request.user)
+
+    departments = filter_departments(departments, request.GET)
+    return export_response(departments, DEPARTMENT_EXPORT_FIELDS, fmt, 'departments',
+                           asynchronous=isinstance(request, ASGIRequest))
+
+
+@login_required
+def user_export_view(request, fmt):
+    if not resolve_role(request).can_view_all:
+        messages.error(request, "You don't have permission to export users.")
+        return redirect('dashboard')
+
+    users = filter_users(User.objects.all(), request.GET)
+    return export_response(users, USER_EXPORT_FIELDS, fmt, 'users', asynchronous=isinstance(request, ASGIRequest))
+
+
+# -----------------------------
+# Stats API
+# -----------------------------
+@api_view(['GET'])
+@permission_classes([IsAdminOrOwnerRole])
+def stats_api_view(request):
+    """
+    Same counters as the admin panel, served from the shared stats cache.
+    """
+    return Response(get_stats())
+
+
 # -----------------------------
 # DRF ViewSets
 # -----------------------------
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = UserProfile.objects.all()
+    # Users with their profile joined in the same SELECT
+    queryset = User.objects.select_related('profile')
     serializer_class = UserSerializer
+    pagination_class = UserCursorPagination
+
+    def get_queryset(self):
+        return filter_users(super().get_queryset(), self.request.query_params)
+
+    def get_permissions(self):
+        # Admins and owners may list users (as in the users export); only
+        # admins may create, change or delete accounts
+        if self.request.method in permissions.SAFE_METHODS:
+            return [IsAdminOrOwnerRole()]
+        return [IsAdminUser()]
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return UserCreateSerializer
+        return UserSerializer
+
+    def perform_destroy(self, instance):
+        # Large cascades are finished in the background
+        delete_user(instance)
 
 class DepartmentViewSet(viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
+    pagination_class = DepartmentCursorPagination
+
+    def get_queryset(self):
+        """
+        Filtered departments, loading only what the response needs:
+        - ?fields= limits the selected columns
+        - The owner is joined only when user_email is rendered
+        """
+        queryset = filter_departments(super().get_queryset(), self.request.query_params)
+        fields = None
+        if self.request.method == 'GET':
+            fields = DepartmentSerializer.requested_fields(self.request)
+        if fields is None:
+            return queryset.select_related('owner')
+
+        columns = DepartmentSerializer.columns_for(fields)
+        if 'owner__email' in columns:
+            queryset = queryset.select_related('owner')
+        return queryset.only(*columns)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = list_validators(queryset, request.query_params.urlencode())
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        department = self.get_object()
+        etag, last_modified = department_validators(department, request.query_params.urlencode())
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        serializer = self.get_serializer(department)
+        return set_validators(Response(serializer.data), etag, last_modified)
+
+    @action(detail=False, methods=['get'], pagination_class=SearchPagination)
+    def search(self, request):
+        """Full-text search over department text fields, best match first (?q=)."""
+        queryset = search_departments(self.get_queryset(), request.query_params.get('q', ''))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync: departments created/updated and ids deleted since the
+        `since` cursor from the previous response (omit it for a full sync).
+        """
+        try:
+            changeset = changes_since(request.query_params.get('since'),
+                                      queryset=Department.objects.select_related('owner'),
+                                      limit=get_changes_page_size(request.query_params))
+        except ValueError as exc:
+            return Response({'since': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'changed': self.get_serializer(changeset.changed, many=True).data,
+            'deleted': changeset.deleted,
+            'since': changeset.cursor,
+            'has_more': changeset.has_more,
+        })
+
+    def perform_create(self, serializer):
+        self._save_with_logo(serializer)
+
+    def perform_update(self, serializer):
+        self._save_with_logo(serializer)
+
+    def _save_with_logo(self, serializer):
+        # Uploaded logos go through the content-hashed variant pipeline
+        upload = serializer.validated_data.pop('logo_path', None)
+        department = serializer.save()
+        if upload:
+            try:
+                store_logo(department, upload)
+            except ValidationError as exc:
+                raise serializers.ValidationError({'logo_path': exc.messages})
+            department.save()
+            build_logo_variants.delay(department.pk)
+
+    @action(detail=False, methods=['post'], url_path='batch', permission_classes=[IsAdminOrOwnerRole])
+    def batch_update(self, request):
+        """
+        Update partnership_status/remarks_status of many departments in one
+        transaction: {"updates": [{"id": 1, "partnership_status": "active"}, ...],
+        "all_or_nothing": false}. Responds with a result per row.
+        """
+        data = request.data if isinstance(request.data, dict) else {'updates': request.data}
+        rows = data.get('updates')
+        if not isinstance(rows, list):
+            return Response({'updates': ['Expected a list of changes.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        all_or_nothing = serializers.BooleanField().to_internal_value(data.get('all_or_nothing', False))
+        try:
+            result = batch_update_departments(rows, all_or_nothing=all_or_nothing)
+        except ValueError as exc:
+            return Response({'updates': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.to_dict())
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminOrOwnerRole])
+    def import_rows(self, request):
+        """
+        Bulk-import departments from an uploaded CSV/NDJSON `file`.
+        Rows without an owner are assigned to the requesting user.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['No file was uploaded.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get('file_format') or guess_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            return Response({'file_format': [f"Use one of: {', '.join(IMPORT_FORMATS)}."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = import_departments(stream, fmt, default_owner=request.user)
+        except ImportDecodeError as exc:
+            return Response({'file': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            stream.detach()
+        return Response(result.to_dict())
 
 # The Department model is defined in partnership.models; the duplicate model
 # definition was removed from views.py to avoid importing or referencing